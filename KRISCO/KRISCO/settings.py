@@ -38,6 +38,8 @@ INSTALLED_APPS = [
     'order',
     'customer',
     'inventory',
+    'sequences',
+    'imports',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -3,7 +3,7 @@ from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import render
 from django.urls import path, reverse
 from django.contrib import messages
-from django.db import transaction
+from imports.views import start_import
 from .models import Customer
 import csv
 import logging
@@ -15,6 +15,8 @@ class CustomerAdmin(admin.ModelAdmin):
     list_display = ('customer_id', 'first_name', 'last_name','mobile_extension','mobile_number', 'email', 'customer_cc_email','customer_bcc_email','customer_type', 'customer_company', 'display_category', 'customer_rank', 'billing_address', 'shipping_address', 'staff_id', 'customer_handler_first_name', 'customer_handler_last_name', 'customer_handler_email')
     search_fields = ['customer_id', 'first_name', 'last_name', 'email']
     list_filter = ('customer_type', 'customer_rank', 'customer_company')
+    # The handler columns read the joined staff row instead of querying it per customer
+    list_select_related = ('staff',)
     actions = ['download_csv_template']
 
     def display_category(self, obj):
@@ -48,26 +50,7 @@ class CustomerAdmin(admin.ModelAdmin):
                 messages.error(request, 'The wrong file type was uploaded. Please upload a CSV file.')
                 return HttpResponseRedirect(request.path_info)
 
-            try:
-                decoded_file = csv_file.read().decode('utf-8').splitlines()
-                reader = csv.DictReader(decoded_file)
-                with transaction.atomic():
-                    for row in reader:
-                        # Assuming 'staff_id' is unique and provided in your CSV
-                        Customer.objects.update_or_create(
-                            staff_id=row.get('staff_id'),
-                            defaults={key: value for key, value in row.items()}
-                        )
-                messages.success(request, 'CSV file has been imported successfully!')
-            except Exception as e:
-                logger.error(f"Error importing CSV: {e}")
-                messages.error(request, 'Something went wrong. Please try again.')
-                return HttpResponseRedirect(request.path_info)
-
-            # Dynamically construct the URL for redirection
-            app_label = Customer._meta.app_label
-            model_name = Customer._meta.model_name
-            return HttpResponseRedirect(reverse(f'admin:{app_label}_{model_name}_changelist'))
+            return start_import(request, 'customer.customer', csv_file)
 
         # Your form rendering code for GET requests
         template_name = 'admin/import_csv.html'
@@ -0,0 +1,113 @@
+from collections import defaultdict
+import csv
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from inventory.importers import IMPORT_BATCH_SIZE, iter_batches, iter_decoded_lines
+from staff.models import StaffEmailConfiguration
+from .models import Customer, allocate_customer_ids, category_mask
+
+logger = logging.getLogger(__name__)
+
+# Columns of the CSV template (see CustomerAdmin.download_csv_template); customer_id is optional
+CUSTOMER_CSV_FIELDS = ['first_name', 'last_name', 'mobile_extension', 'mobile_number', 'email',
+                       'customer_cc_email', 'customer_bcc_email', 'customer_type', 'customer_company',
+                       'customer_category', 'customer_rank', 'billing_address', 'shipping_address', 'staff_id']
+
+
+def parse_customer_row(row, staff_by_id):
+    # Convert one CSV row into Customer field values; raises ValueError with a readable message
+    values = {field: (row.get(field) or '').strip() for field in CUSTOMER_CSV_FIELDS}
+    if not values['first_name'] or not values['last_name']:
+        raise ValueError("first_name and last_name are required")
+    if not values['email']:
+        raise ValueError("email is required")
+    if values['staff_id'] not in staff_by_id:
+        raise ValueError(f"Invalid staff ID {values['staff_id']!r}, staff does not exist")
+    try:
+        values['mobile_extension'] = int(values['mobile_extension'])
+    except ValueError:
+        raise ValueError(f"Invalid mobile_extension {values['mobile_extension']!r}")
+    values['customer_category'] = [category.strip() for category in values['customer_category'].split(',') if category.strip()]
+    values['customer_category_mask'] = category_mask(values['customer_category'])
+    return values
+
+
+def import_customers(rows, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Create or update customers from CSV dict rows with a fixed number of queries per batch.
+
+    Rows are read `batch_size` at a time, so an upload is never held in memory
+    whole. Existing customers are matched on customer_id when the row has one,
+    else on the case-insensitive email, with a single prefetch per batch. New
+    customers get their IDs in one sequence allocation per name prefix and
+    everything is written with bulk_create / bulk_update, one transaction per
+    batch. Invalid rows are skipped and reported as (line number, message) in
+    the returned summary, which is also passed to `progress` after each batch.
+    """
+    summary = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+
+    for batch in iter_batches(enumerate(rows, start=2), batch_size):  # line 1 is the header
+        staff_by_id = StaffEmailConfiguration.objects.in_bulk(
+            {(row.get('staff_id') or '').strip() for _, row in batch}, field_name='staff_id'
+        )
+
+        parsed = {}
+        for line, row in batch:
+            try:
+                values = parse_customer_row(row, staff_by_id)
+            except ValueError as e:
+                summary['errors'].append((line, str(e)))
+                continue
+            customer_id = (row.get('customer_id') or '').strip()
+            # The last row wins when the same customer appears twice in the batch; across batches
+            # the later row finds the customer the earlier batch wrote and updates it
+            key = ('customer_id', customer_id) if customer_id else ('email', values['email'].lower())
+            parsed[key] = values
+
+        customer_ids = [value for kind, value in parsed if kind == 'customer_id']
+        emails = [value for kind, value in parsed if kind == 'email']
+        by_customer_id = {}
+        by_email = {}
+        existing = (
+            Customer.objects.annotate(email_lower=Lower('email'))
+            .filter(Q(customer_id__in=customer_ids) | Q(email_lower__in=emails))
+            .order_by('pk')
+        )
+        for customer in existing:
+            by_customer_id[customer.customer_id] = customer
+            by_email.setdefault(customer.email_lower, customer)
+
+        to_create = defaultdict(list)
+        to_update = []
+        for (kind, value), values in parsed.items():
+            customer = by_customer_id.get(value) if kind == 'customer_id' else by_email.get(value)
+            if customer is None:
+                prefix = f"{values['first_name'][0]}{values['last_name'][0]}"
+                to_create[prefix].append(Customer(**values))
+            else:
+                for field, field_value in values.items():
+                    setattr(customer, field, field_value)
+                to_update.append(customer)
+
+        with transaction.atomic():
+            for prefix, customers in to_create.items():
+                for customer, customer_id in zip(customers, allocate_customer_ids(prefix, len(customers))):
+                    customer.customer_id = customer_id
+                Customer.objects.bulk_create(customers, batch_size=batch_size)
+                summary['created'] += len(customers)
+            Customer.objects.bulk_update(to_update, CUSTOMER_CSV_FIELDS + ['customer_category_mask'], batch_size=batch_size)
+
+        summary['updated'] += len(to_update)
+        summary['skipped'] = len(summary['errors'])
+        if progress:
+            progress(summary)
+
+    return summary
+
+
+def import_customer_file(uploaded_file, progress=None):
+    return import_customers(csv.DictReader(iter_decoded_lines(uploaded_file)), progress=progress)
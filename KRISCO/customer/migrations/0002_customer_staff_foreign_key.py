@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the plain staff_id column into a ForeignKey to StaffEmailConfiguration.staff_id.
+
+    The column is left untouched by the first step (state only), then the
+    second step makes it nullable and indexes it; no FK constraint is created.
+    """
+
+    dependencies = [
+        ('staff', '0001_initial'),
+        ('customer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='customer',
+                    name='staff_id',
+                ),
+                migrations.AddField(
+                    model_name='customer',
+                    name='staff',
+                    field=models.ForeignKey(db_column='staff_id', db_constraint=False, db_index=False, default='', on_delete=django.db.models.deletion.DO_NOTHING, related_name='customers', to='staff.staffemailconfiguration', to_field='staff_id'),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='staff',
+            field=models.ForeignKey(db_column='staff_id', db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='customers', to='staff.staffemailconfiguration', to_field='staff_id'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.4 on 2026-10-18 06:59
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# CUSTOMER_CATEGORY_CHOICES order at the time of this migration
+CATEGORY_BITS = {'LUXURY': 1, 'MAKEUP': 2, 'FMCG': 4, 'HAIRCARE': 8, 'SKINCARE': 16}
+
+
+def fill_category_masks(apps, schema_editor):
+    # One UPDATE per distinct mask instead of one per customer
+    Customer = apps.get_model('customer', 'Customer')
+    pks_by_mask = defaultdict(list)
+    for pk, categories in Customer.objects.values_list('pk', 'customer_category').iterator():
+        if isinstance(categories, str):
+            categories = categories.split(',')
+        mask = 0
+        for category in categories or []:
+            mask |= CATEGORY_BITS.get(category.strip(), 0)
+        if mask:
+            pks_by_mask[mask].append(pk)
+    for mask, pks in pks_by_mask.items():
+        for start in range(0, len(pks), 1000):
+            Customer.objects.filter(pk__in=pks[start:start + 1000]).update(customer_category_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0002_customer_staff_foreign_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='customer_category_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_category_masks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['customer_rank', 'customer_type', 'customer_category_mask'], name='customer_audience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['customer_category_mask'], name='customer_category_mask_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from multiselectfield import MultiSelectField
 from staff.models import StaffEmailConfiguration
 from django.core.exceptions import ValidationError
+from sequences.models import allocate
 
 # Define choices for the dropdown fields
 CUSTOMER_TYPE_CHOICES = (
@@ -33,6 +36,38 @@ CUSTOMER_RANK_CHOICES = (
     # Add more choices as needed
 )
 
+# Bit of each category in Customer.customer_category_mask
+CUSTOMER_CATEGORY_BITS = {category: 1 << index for index, (category, _) in enumerate(CUSTOMER_CATEGORY_CHOICES)}
+
+def category_mask(categories):
+    # Bitmask of a customer_category value (list or comma separated string); unknown values are ignored
+    if isinstance(categories, str):
+        categories = categories.split(',')
+    mask = 0
+    for category in categories or []:
+        mask |= CUSTOMER_CATEGORY_BITS.get(category.strip(), 0)
+    return mask
+
+class CustomerQuerySet(models.QuerySet):
+    def in_categories(self, categories):
+        # Customers having any of `categories`: an IN over every mask that intersects the selection,
+        # so the lookup stays on the (rank, type, mask) index instead of a LIKE scan
+        selected = category_mask(categories)
+        if not selected:
+            return self
+        return self.filter(customer_category_mask__in=[
+            mask for mask in range(1 << len(CUSTOMER_CATEGORY_BITS)) if mask & selected
+        ])
+
+
+    def with_handler(self):
+        # Handler details joined in the same query, e.g. for .values() exports
+        return self.annotate(
+            staff_first_name=Coalesce('staff__first_name', Value('')),
+            staff_last_name=Coalesce('staff__last_name', Value('')),
+            staff_email=Coalesce('staff__username', Value('')),
+        )
+
 class Customer(models.Model):
     customer_id = models.CharField(max_length=50, editable=False)
     first_name = models.CharField(max_length=100)
@@ -45,52 +80,79 @@ class Customer(models.Model):
     customer_type = models.CharField(max_length=50, choices=CUSTOMER_TYPE_CHOICES)
     customer_company = models.CharField(max_length=100)
     customer_category = MultiSelectField(choices=CUSTOMER_CATEGORY_CHOICES)
+    # customer_category as CUSTOMER_CATEGORY_BITS flags, kept in sync by save() and the CSV import
+    customer_category_mask = models.PositiveIntegerField(default=0, editable=False)
     customer_rank = models.CharField(max_length=50, choices=CUSTOMER_RANK_CHOICES)
     billing_address = models.TextField()
     shipping_address = models.TextField()
-    staff_id = models.CharField(max_length=50)  # Using staff_id to store the identifier
+    # Joinable link to the handling staff member; the column keeps holding the staff_id string.
+    # No DB constraint, so rows pointing at a removed staff member stay valid and read back as no handler
+    staff = models.ForeignKey(
+        StaffEmailConfiguration,
+        to_field='staff_id',
+        db_column='staff_id',
+        db_constraint=False,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        related_name='customers',
+    )
+
+    objects = CustomerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer_rank', 'customer_type', 'customer_category_mask'], name='customer_audience_idx'),
+            models.Index(fields=['customer_category_mask'], name='customer_category_mask_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer_id} - {self.first_name} {self.last_name}"
 
     @property
-    def staff(self):
-        # Fetch the StaffEmailConfiguration instance based on staff_id
+    def handler(self):
+        # The related staff member, or None if staff_id no longer matches one
         try:
-            return StaffEmailConfiguration.objects.get(staff_id=self.staff_id)
+            return self.staff
         except StaffEmailConfiguration.DoesNotExist:
             return None
 
     @property
     def customer_handler_first_name(self):
         # Dynamically fetch the handler's first name from StaffEmailConfiguration
-        staff = self.staff
+        staff = self.handler
         return staff.first_name if staff else ''
 
     @property
     def customer_handler_last_name(self):
         # Dynamically fetch the handler's last name from StaffEmailConfiguration
-        staff = self.staff
+        staff = self.handler
         return staff.last_name if staff else ''
 
     @property
     def customer_handler_email(self):
         # Dynamically fetch the handler's email from StaffEmailConfiguration
-        staff = self.staff
+        staff = self.handler
         return staff.username if staff else ''
 
     def clean(self):
         # Ensure that staff_id corresponds to an existing StaffEmailConfiguration
         if self.staff_id and not StaffEmailConfiguration.objects.filter(staff_id=self.staff_id).exists():
-            raise ValidationError({'staff_id': 'Invalid staff ID, staff does not exist.'})
+            raise ValidationError({'staff': 'Invalid staff ID, staff does not exist.'})
         
     def save(self, *args, **kwargs):
         if not self.pk:  # Check if this is a new instance
             prefix = f"{self.first_name[0]}{self.last_name[0]}"  # First letters of first and last name
-            last_customer = Customer.objects.filter(customer_id__startswith=prefix).order_by('customer_id').last()
-            if last_customer:
-                sequence_num = int(last_customer.customer_id[2:-4]) + 1  # Extract and increment the sequence
-            else:
-                sequence_num = 1  # Start from 1 if no other customer is found
-            self.customer_id = f"{prefix}{sequence_num:09}KSNJ"  # Format the customer_id
+            self.customer_id = allocate_customer_ids(prefix)[0]
+        self.customer_category_mask = category_mask(self.customer_category)
         super().save(*args, **kwargs)  # Call the super class's save method
+
+
+def format_customer_id(prefix, sequence_num):
+    return f"{prefix}{sequence_num:09}KSNJ"
+
+def allocate_customer_ids(prefix, count=1):
+    # Reserve `count` consecutive customer IDs for `prefix` in one round trip
+    def last_in_use():
+        last_customer = Customer.objects.filter(customer_id__startswith=prefix).order_by('customer_id').last()
+        return int(last_customer.customer_id[2:-4]) if last_customer else 0
+    return [format_customer_id(prefix, sequence_num) for sequence_num in allocate(f'customer:{prefix}', count, last_in_use)]
@@ -1,3 +1,39 @@
 from django.test import TestCase
 
-# Create your tests here.
+from staff.models import StaffEmailConfiguration
+from .importers import import_customers
+from .models import Customer
+
+
+class ImportCustomersTests(TestCase):
+
+    def setUp(self):
+        self.staff = StaffEmailConfiguration.objects.create(first_name='Sam', last_name='Sales', username='sam@example.com', password='secret')
+
+    def row(self, email, **values):
+        return {
+            'first_name': 'Ada', 'last_name': 'Buyer', 'mobile_extension': '1', 'mobile_number': '5550100',
+            'email': email, 'customer_type': 'MASS', 'customer_company': 'Shop', 'customer_category': 'LUXURY',
+            'customer_rank': 'GOLD', 'billing_address': 'Main St', 'shipping_address': 'Main St',
+            'staff_id': self.staff.staff_id, **values,
+        }
+
+    def test_email_match_ignores_case(self):
+        import_customers([self.row('Ada@Example.com')])
+        summary = import_customers([self.row('ada@EXAMPLE.com', customer_company='New Shop')])
+
+        self.assertEqual((summary['created'], summary['updated']), (0, 1))
+        customer = Customer.objects.get()
+        self.assertEqual((customer.email, customer.customer_company), ('ada@EXAMPLE.com', 'New Shop'))
+
+    def test_rows_are_written_batch_by_batch(self):
+        rows = [self.row('a@example.com'), self.row('b@example.com'), self.row('c@example.com', staff_id='NOPE'),
+                self.row('A@example.com', customer_company='Later')]
+        progress = []
+        summary = import_customers(iter(rows), batch_size=2, progress=lambda s: progress.append(dict(s, errors=list(s['errors']))))
+
+        self.assertEqual([(s['created'], s['updated'], s['skipped']) for s in progress], [(2, 0, 0), (2, 1, 1)])
+        self.assertEqual(summary['errors'], [(4, "Invalid staff ID 'NOPE', staff does not exist")])
+        # The duplicate in the second batch updates the customer the first batch created
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(Customer.objects.get(email__iexact='a@example.com').customer_company, 'Later')
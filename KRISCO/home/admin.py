@@ -14,6 +14,7 @@ from urllib.request import urlopen
 from django.core.files.images import ImageFile
 from django.core.files.base import ContentFile
 from io import BytesIO
+from imports.views import start_import
 from .models import *
 import csv
 import logging
@@ -57,35 +58,7 @@ class BrandAdmin(admin.ModelAdmin):
                     messages.error(request, 'The wrong file type was uploaded. Please upload a CSV file.')
                     return HttpResponseRedirect(request.path_info)
 
-                try:
-                    decoded_file = csv_file.read().decode('utf-8').splitlines()
-                    reader = csv.DictReader(decoded_file)
-                    with transaction.atomic():
-                        for row in reader:
-                            brand_name = row.get('brand_name')
-                            image_path = row.get('image')  # Get the image path from the CSV
-                            
-                            # Create a new Brand object
-                            brand, created = Brand.objects.get_or_create(
-                                brand_name=brand_name,
-                            )
-                            
-                            # Handle image upload if the path is provided
-                            if image_path:
-                                # Construct the full local file path
-                                full_file_path = os.path.join(settings.MEDIA_ROOT, image_path)
-                                
-                                # Open the image file
-                                with open(full_file_path, 'rb') as image_file:
-                                    brand.image.save(os.path.basename(image_path), ContentFile(image_file.read()), save=True)
-                            
-                            # Save the Brand object
-                            brand.save()
-
-                        messages.success(request, 'CSV file has been imported successfully!')
-                except Exception as e:
-                            messages.error(request, 'Something went wrong: ' + str(e))
-                            return HttpResponseRedirect(request.path_info)
+                return start_import(request, 'home.brand', csv_file)
 
                 # For GET requests, show a simple upload form
             return render(request, 'admin/import_csv.html')
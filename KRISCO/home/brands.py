@@ -0,0 +1,85 @@
+from django.db.models import Q
+
+from .models import Brand, normalize_brand
+
+# Shortest key that may match a longer brand name by prefix ("CHANELPARIS" -> "CHANEL")
+MIN_PREFIX_KEY_LENGTH = 3
+
+
+class BrandIndex:
+    """
+    In-memory alias index of home.Brand, built with one query.
+
+    resolve() maps a free-text brand to (brand_key, brand_id): an exact key
+    match first, then the longest Brand key the text starts with. Unknown
+    brands keep their own key and a None id. Results are memoized, so an
+    import of many rows costs one lookup per distinct brand string.
+    """
+
+    def __init__(self, brands=None):
+        if brands is None:
+            brands = Brand.objects.values_list('pk', 'brand_name')
+        self.ids_by_key = {}
+        for pk, brand_name in brands:
+            self.ids_by_key.setdefault(normalize_brand(brand_name), pk)
+        self.prefix_keys = sorted(
+            (key for key in self.ids_by_key if len(key) >= MIN_PREFIX_KEY_LENGTH), key=len, reverse=True
+        )
+        self.resolved = {}
+
+    def resolve(self, name):
+        if name not in self.resolved:
+            key = normalize_brand(name)
+            if key not in self.ids_by_key:
+                key = next((prefix for prefix in self.prefix_keys if key.startswith(prefix)), key)
+            self.resolved[name] = (key, self.ids_by_key.get(key))
+        return self.resolved[name]
+
+
+def resolve_brand(name):
+    # Single-row resolution for model saves, with the same result as BrandIndex.resolve: one indexed
+    # IN on brand_key over the key and its prefixes, instead of loading every brand on a miss.
+    # Bulk paths should share one BrandIndex instead
+    key = normalize_brand(name)
+    candidates = {key, *(key[:length] for length in range(MIN_PREFIX_KEY_LENGTH, len(key)))}
+    ids_by_key = {}
+    for brand_key, pk in Brand.objects.filter(brand_key__in=candidates).order_by('pk').values_list('brand_key', 'pk'):
+        ids_by_key.setdefault(brand_key, pk)
+    if not ids_by_key:
+        return key, None
+    # The exact key is the longest candidate, so it wins over any prefix
+    match = max(ids_by_key, key=len)
+    return match, ids_by_key[match]
+
+
+def with_brand_refs(rows, index=None, field='brand'):
+    # Add brand_key / brand_ref_id to field dicts (None entries pass through) for bulk_upsert
+    index = index or BrandIndex()
+    for values in rows:
+        if values is not None:
+            values['brand_key'], values['brand_ref_id'] = index.resolve(values.get(field))
+        yield values
+
+
+def brand_filter(names, index=None):
+    """
+    Q object matching rows of any of the free-text brands in `names`.
+
+    Resolved brands become an integer IN on brand_ref. Rows are only linked
+    to a home.Brand when they are saved or imported, so rows written before
+    their brand was added or renamed still have a NULL brand_ref; those are
+    matched with an IN on the indexed brand_key, on both the resolved key and
+    the key of the name itself.
+    """
+    index = index or BrandIndex()
+    ids = set()
+    keys = set()
+    for name in names:
+        key, brand_id = index.resolve(name)
+        keys.update((key, normalize_brand(name)))
+        if brand_id is not None:
+            ids.add(brand_id)
+    condition = Q(brand_ref__isnull=True, brand_key__in=sorted(keys))
+    if ids:
+        condition |= Q(brand_ref_id__in=sorted(ids))
+    return condition
@@ -0,0 +1,41 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+
+from inventory.importers import IMPORT_BATCH_SIZE, iter_decoded_lines
+from .models import Brand
+
+
+def import_brand_file(uploaded_file, progress=None):
+    """
+    Create brands from a CSV with brand_name and image columns.
+
+    Brands go through Brand.save() one by one, since saving assigns the
+    brand_id and brand_key; brand lists are short. `image` is a path under
+    MEDIA_ROOT. Each row is saved in its own savepoint; rows that fail,
+including database constraint errors, are skipped and reported as
+(line, message).
+    """
+    summary = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+    for line, row in enumerate(csv.DictReader(iter_decoded_lines(uploaded_file)), start=2):  # line 1 is the header
+        try:
+            brand_name = row.get('brand_name')
+            if not brand_name:
+                raise ValueError("brand_name is required")
+            with transaction.atomic():
+                brand, created = Brand.objects.get_or_create(brand_name=brand_name)
+                image_path = row.get('image')
+                if image_path:
+                    with open(os.path.join(settings.MEDIA_ROOT, image_path), 'rb') as image_file:
+                        brand.image.save(os.path.basename(image_path), ContentFile(image_file.read()), save=True)
+        except (ValueError, OSError, IntegrityError) as e:
+            summary['skipped'] += 1
+            summary['errors'].append((line, str(e)))
+        else:
+            summary['created' if created else 'updated'] += 1
+        if progress and line % IMPORT_BATCH_SIZE == 0:
+            progress(summary)
+    return summary
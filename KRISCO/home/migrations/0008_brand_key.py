@@ -0,0 +1,28 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:01
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_brand_keys(apps, schema_editor):
+    Brand = apps.get_model('home', 'Brand')
+    for brand in Brand.objects.all():
+        brand.brand_key = re.sub(r'[^A-Z0-9]+', '', brand.brand_name.upper())
+        brand.save(update_fields=['brand_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_auto_20240227_0334'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brand',
+            name='brand_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_brand_keys, migrations.RunPython.noop),
+    ]
@@ -1,34 +1,56 @@
+import re
+
 from django.db import models
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.db.models import Max
 from staff.models import StaffEmailConfiguration
+from sequences.models import allocate
 # Create your models here.
 
 class Brand(models.Model):
     brand_name = models.CharField(max_length=255, unique=True)
     brand_id = models.CharField(max_length=255, unique=True, blank=True)
+    # Normalized brand_name (see normalize_brand) used to match free-text brands
+    brand_key = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
     image = models.ImageField(upload_to='brands/')
 
     def __str__(self):
         return self.brand_name
 
+class BrandReference(models.Model):
+    # Canonical brand columns for models with a free-text `brand` field
+    brand_key = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    brand_ref = models.ForeignKey(Brand, null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='%(app_label)s_%(class)s_set')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from .brands import resolve_brand
+        self.brand_key, self.brand_ref_id = resolve_brand(self.brand)
+        super().save(*args, **kwargs)
+
+def normalize_brand(name):
+    # Canonical key of a free-text brand: uppercase letters and digits only, so
+    # "L'Oreal", "LOREAL " and "l-oreal" all become "LOREAL"
+    return re.sub(r'[^A-Z0-9]+', '', (name or '').upper())
+
 @receiver(pre_save, sender=Brand)
 def pre_save_brand(sender, instance, *args, **kwargs):
     if not instance.brand_id:
         instance.brand_id = generate_brand_id(instance.brand_name)
+    instance.brand_key = normalize_brand(instance.brand_name)
 
 def generate_brand_id(brand_name):
     if brand_name:
         base_id = f"{brand_name[0]}{brand_name[-1]}".upper()
-        last_brand = Brand.objects.filter(brand_id__startswith=base_id).aggregate(max_id=Max('brand_id'))
-        max_id = last_brand.get('max_id')
 
-        if max_id:
-            sequence_num = int(max_id[2:-4]) + 1  # Assuming the sequence is always at this position.
-        else:
-            sequence_num = 1
+        def last_in_use():
+            max_id = Brand.objects.filter(brand_id__startswith=base_id).aggregate(max_id=Max('brand_id')).get('max_id')
+            return int(max_id[2:-4]) if max_id else 0  # Assuming the sequence is always at this position.
 
+        sequence_num = allocate(f'brand:{base_id}', initial=last_in_use)[0]
         new_id = f"{base_id}{str(sequence_num).zfill(7)}KSNJ"
         return new_id
     return None
@@ -1,3 +1,44 @@
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.models import Item
+from .brands import BrandIndex, brand_filter, resolve_brand
+from .models import Brand
+
+
+class BrandFilterTests(TestCase):
+
+    def create_item(self, sku, brand):
+        return Item.objects.create(sku=sku, description='Test', brand=brand, upc='NO UPC', unit_weight=0, price=0, classification='')
+
+    def filtered_skus(self, names):
+        return set(Item.objects.filter(brand_filter(names)).values_list('sku', flat=True))
+
+    def test_unknown_brand_matches_on_key(self):
+        self.create_item('A-1', "L'Oreal")
+        self.create_item('B-1', 'Other')
+        self.assertEqual(self.filtered_skus(['LOREAL']), {'A-1'})
+
+    def test_rows_saved_before_their_brand_still_match(self):
+        self.create_item('A-1', 'Chanel')
+        self.create_item('A-2', 'Chanel Paris')
+        Brand.objects.create(brand_name='CHANEL', image='brands/chanel.png')
+        self.create_item('A-3', 'Chanel')
+        self.assertFalse(Item.objects.get(sku='A-1').brand_ref_id)
+        self.assertEqual(self.filtered_skus(['Chanel', 'Chanel Paris']), {'A-1', 'A-2', 'A-3'})
+
+    def test_empty_names_match_nothing(self):
+        self.create_item('A-1', 'Chanel')
+        self.assertEqual(self.filtered_skus([]), set())
+
+
+class ResolveBrandTests(TestCase):
+
+    def setUp(self):
+        for name in ('CHANEL', 'CHANEL PARIS', 'DIOR', 'YSL'):
+            Brand.objects.create(brand_name=name, image=f'brands/{name}.png')
+
+    def test_matches_brand_index_with_one_query(self):
+        index = BrandIndex()
+        for name in ('Chanel', 'chanel paris', 'Chanel Paris No 5', 'Chanelle', 'Dior Homme', 'YSL', 'YSLX', 'Unknown', ''):
+            with self.assertNumQueries(1):
+                self.assertEqual(resolve_brand(name), index.resolve(name), name)
@@ -0,0 +1,66 @@
+from django.contrib import admin, messages
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import path
+from django.views.decorators.http import require_GET
+
+from .jobs import fail_jobs, requeue_jobs
+from .models import ImportJob
+
+# Register your models here.
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'target', 'status', 'rows_done', 'created', 'updated', 'unchanged', 'skipped', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'target', 'created_at')
+    readonly_fields = ('target', 'upload', 'original_name', 'status', 'rows_done', 'created', 'updated', 'unchanged', 'skipped', 'errors', 'error_message', 'created_by', 'created_at', 'worker', 'started_at', 'heartbeat_at', 'finished_at')
+    actions = ['mark_failed', 'requeue']
+
+    def has_add_permission(self, request):
+        return False
+
+    def mark_failed(self, request, queryset):
+        # Way out for a job whose worker died before the stale timeout; its target is unblocked
+        failed = fail_jobs(queryset, f"Marked as failed by {request.user.username}.")
+        messages.success(request, f"{failed} running job(s) marked as failed.")
+
+    mark_failed.short_description = "Mark selected running jobs as failed"
+
+    def requeue(self, request, queryset):
+        requeued = requeue_jobs(queryset)
+        messages.success(request, f"{requeued} failed job(s) queued again.")
+
+    requeue.short_description = "Queue selected failed jobs again"
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:job_id>/progress/', self.admin_site.admin_view(self.progress), name='imports_importjob_progress'),
+            path('<int:job_id>/progress/status/', self.admin_site.admin_view(self.progress_status), name='imports_importjob_progress_status'),
+        ]
+        return custom_urls + urls
+
+    def progress(self, request, job_id):
+        job = get_object_or_404(ImportJob, pk=job_id)
+        return render(request, 'admin/imports/importjob/progress.html', {'job': job, 'target_changelist': f"admin:{job.target.replace('.', '_')}_changelist"})
+
+    @staticmethod
+    @require_GET
+    def progress_status(request, job_id):
+        # Polled by the progress page: one indexed row, no file access
+        job = get_object_or_404(
+            ImportJob.objects.only('status', 'rows_done', 'created', 'updated', 'unchanged', 'skipped', 'errors', 'error_message', 'started_at', 'finished_at'),
+            pk=job_id,
+        )
+        return JsonResponse({
+            'status': job.status,
+            'is_finished': job.is_finished,
+            'rows_done': job.rows_done,
+            'created': job.created,
+            'updated': job.updated,
+            'unchanged': job.unchanged,
+            'skipped': job.skipped,
+            'rows_per_second': job.rows_per_second,
+            'errors': job.errors,
+            'error_message': job.error_message,
+        })
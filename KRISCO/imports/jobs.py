@@ -0,0 +1,193 @@
+from datetime import timedelta
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ImportJob, ImportLock
+
+logger = logging.getLogger(__name__)
+
+# Importer of each target: callable(file, progress=None) returning a summary dict with the
+# created / updated / skipped counts, an optional unchanged count and (line, message) errors.
+# `progress` is called with the running summary after every written batch.
+IMPORT_HANDLERS = {
+    'inventory.item': 'inventory.importers.import_item_file',
+    'inventory.stock': 'inventory.importers.import_stock_file',
+    'inventory.inoutreport': 'inventory.staging.import_inout_file',
+    'offers.weekly_offer': 'offers.importers.import_weekly_offer_file',
+    'customer.customer': 'customer.importers.import_customer_file',
+    'home.brand': 'home.importers.import_brand_file',
+}
+
+# Skipped rows stored on the job; the rest are only counted
+MAX_RECORDED_ERRORS = 100
+# RUNNING jobs without a heartbeat for this long are failed, so a dead worker does not block their target
+STALE_JOB_TIMEOUT = getattr(settings, 'IMPORT_JOB_STALE_TIMEOUT', 60 * 30)
+# Seconds between two heartbeats of a running job, whatever phase its handler is in
+HEARTBEAT_INTERVAL = getattr(settings, 'IMPORT_JOB_HEARTBEAT_INTERVAL', 60)
+
+
+class JobLost(Exception):
+    # The job was failed (stale or from the admin) while this worker was still running it
+    pass
+
+
+def worker_id():
+    # Identifies one claim: host, process and a random part, since a process claims many jobs
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Heartbeat(threading.Thread):
+    """
+    Refresh heartbeat_at of a running job every `interval` seconds until stopped.
+
+    `jobs` is a queryset of the job row that only matches while the worker
+    still owns it. Beating on a timer keeps the job alive through phases that
+    report no progress, such as encoding detection, validation or the staging
+    table swap. Used as a context manager around the work of the job.
+    """
+
+    def __init__(self, jobs, interval=HEARTBEAT_INTERVAL):
+        super().__init__(daemon=True)
+        self.jobs = jobs
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                if not self.jobs.update(heartbeat_at=timezone.now()):
+                    return  # The job was taken away; run_job finds out when it reports
+        finally:
+            connection.close()  # The thread's own connection
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+def queue_import(user, target, uploaded_file):
+    # Spool the upload to storage and queue it; the request returns without reading the rows
+    return ImportJob.objects.create(
+        target=target,
+        upload=uploaded_file,
+        original_name=uploaded_file.name,
+        created_by=user,
+    )
+
+
+def _lock_target(target):
+    # Lock the ImportLock row of `target` until the surrounding transaction ends
+    try:
+        with transaction.atomic():
+            ImportLock.objects.get_or_create(target=target)
+    except IntegrityError:
+        pass  # Created concurrently; the locking read below sees the committed row
+    return ImportLock.objects.select_for_update().get(target=target)
+
+
+def fail_jobs(jobs, message):
+    # Mark RUNNING jobs of the `jobs` queryset as FAILED; returns the number of jobs changed
+    return jobs.filter(status='RUNNING').update(status='FAILED', error_message=message, finished_at=timezone.now())
+
+
+def fail_stale_jobs(timeout=STALE_JOB_TIMEOUT):
+    """
+    Fail RUNNING jobs whose worker stopped sending heartbeats.
+
+    A worker killed mid-import (deploy, OOM) leaves its job RUNNING, and
+    claim_next_job never starts another job of a target with a RUNNING job.
+    Rows already written stay; the upload can be queued again from the admin.
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = ImportJob.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff))
+    failed = fail_jobs(stale, f"The import worker stopped responding for more than {timeout} seconds.")
+    if failed:
+        logger.warning(f"Failed {failed} stale import job(s)")
+    return failed
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job whose target is idle as running.
+
+    Claims of the same target are serialized on its ImportLock row, so two
+    uploads of one model are imported one after the other instead of writing
+    the same rows concurrently; jobs of other targets run in parallel workers.
+    Stale jobs are failed first so a dead worker does not block its target.
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        pending = ImportJob.objects.select_for_update(skip_locked=True).filter(status='PENDING').order_by('created_at')
+        for job in pending:
+            _lock_target(job.target)
+            if ImportJob.objects.filter(target=job.target, status='RUNNING').exists():
+                continue
+            job.status = 'RUNNING'
+            job.worker = worker_id()
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.save(update_fields=['status', 'worker', 'started_at', 'heartbeat_at'])
+            return job
+    return None
+
+
+def owned_job(job):
+    # The job row while it is still RUNNING under this worker's claim
+    return ImportJob.objects.filter(pk=job.pk, status='RUNNING', worker=job.worker)
+
+
+def _record_progress(job, summary):
+    # Summaries are cumulative, so each call overwrites the counters.
+    # Raises JobLost once the claim is gone, so the handler stops writing rows
+    # another job of the same target may already be importing
+    updated = owned_job(job).update(
+        rows_done=summary['created'] + summary['updated'] + summary.get('unchanged', 0) + summary['skipped'],
+        created=summary['created'],
+        updated=summary['updated'],
+        unchanged=summary.get('unchanged', 0),
+        skipped=summary['skipped'],
+        errors=[list(error) for error in summary.get('errors', [])[:MAX_RECORDED_ERRORS]],
+        heartbeat_at=timezone.now(),
+    )
+    if not updated:
+        raise JobLost(f"Import job {job.pk} is no longer running under this worker")
+
+
+def requeue_jobs(jobs):
+    # Queue FAILED jobs of the `jobs` queryset again with reset counters; returns the number of jobs changed
+    return jobs.filter(status='FAILED').update(
+        status='PENDING', rows_done=0, created=0, updated=0, unchanged=0, skipped=0, errors=[],
+        error_message='', worker='', started_at=None, heartbeat_at=None, finished_at=None,
+    )
+
+
+def run_job(job):
+    status, error_message = 'DONE', ''
+    try:
+        handler = import_string(IMPORT_HANDLERS[job.target])
+        with Heartbeat(owned_job(job)), job.upload.open('rb') as upload:
+            summary = handler(upload, progress=lambda summary: _record_progress(job, summary))
+        _record_progress(job, summary)
+    except JobLost:
+        pass  # Reported below
+    except Exception as e:
+        logger.error(f"Import job {job.pk} failed: {e}")
+        status, error_message = 'FAILED', str(e)
+
+    # A job failed while it ran keeps that status, even if this worker got to the end
+    if not owned_job(job).update(status=status, error_message=error_message, finished_at=timezone.now()):
+        logger.warning(f"Import job {job.pk} was failed while running; its result is discarded")
+    job.refresh_from_db()
+    return job
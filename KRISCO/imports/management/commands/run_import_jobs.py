@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from imports.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued admin file imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when no pending job is left instead of polling.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait between polls for new jobs.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"Importing job {job.pk} ({job.target}, {job.original_name})...")
+            job = run_job(job)
+            self.stdout.write(
+                f"Job {job.pk} {job.status}: {job.created} created, {job.updated} updated, "
+                f"{job.unchanged} unchanged, {job.skipped} skipped, {job.rows_per_second} rows/s."
+            )
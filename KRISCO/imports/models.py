@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+# Create your models here.
+
+# Import targets as app_label.model_name; see imports.jobs.IMPORT_HANDLERS for the importer of each
+IMPORT_TARGET_CHOICES = [
+    ('inventory.item', 'Items'),
+    ('inventory.stock', 'Stock'),
+    ('inventory.inoutreport', 'In & Out Report'),
+    ('offers.weekly_offer', 'Weekly Offers'),
+    ('customer.customer', 'Customers'),
+    ('home.brand', 'Brands'),
+]
+
+
+class ImportJob(models.Model):
+    # Uploaded file queued for import, processed by the run_import_jobs management command
+    STATUS_CHOICES = [
+        ('PENDING', 'PENDING'),
+        ('RUNNING', 'RUNNING'),
+        ('DONE', 'DONE'),
+        ('FAILED', 'FAILED'),
+    ]
+    target = models.CharField(max_length=50, choices=IMPORT_TARGET_CHOICES)
+    upload = models.FileField(upload_to='imports/%Y/%m/')
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='PENDING')
+    rows_done = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="First skipped rows as [line, message] pairs.")
+    error_message = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Claim of the worker running the job (see imports.jobs.worker_id); a worker only finishes jobs it still owns
+    worker = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker on a timer and after every written batch; a RUNNING job without recent heartbeat has lost its worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Import Job'
+        verbose_name_plural = 'Import Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'target'], name='import_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_display()} - {self.original_name} - {self.status} ({self.rows_done} rows)"
+
+    @property
+    def is_finished(self):
+        return self.status in ('DONE', 'FAILED')
+
+    @property
+    def rows_per_second(self):
+        if self.started_at is None:
+            return 0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_done / elapsed, 1) if elapsed > 0 else 0
+
+
+class ImportLock(models.Model):
+    # One row per target; workers lock it while claiming so imports of the same model never run concurrently
+    target = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.target
@@ -0,0 +1,94 @@
+from datetime import timedelta
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .jobs import STALE_JOB_TIMEOUT, Heartbeat, claim_next_job, fail_jobs, fail_stale_jobs, owned_job, requeue_jobs, run_job
+from .models import ImportJob
+
+STOCK_FILE = (
+    b"SKU\tUPC\tItem Classification\tDescription\tOnHand\tAllocated\tAvailable\tCost\n"
+    b"A\t1\tPERFUMES\tAlpha\t5\t0\t5\t1.50\n"
+)
+
+
+class JobFixtures:
+
+    def setUp(self):
+        self.user = User.objects.create_user('importer')
+
+    def create_job(self, upload=b'', **fields):
+        return ImportJob.objects.create(
+            target='inventory.stock', upload=ContentFile(upload, name='stock.txt'), original_name='stock.txt',
+            created_by=self.user, **fields
+        )
+
+
+class StaleJobTests(JobFixtures, TestCase):
+
+    def test_dead_worker_no_longer_blocks_its_target(self):
+        long_ago = timezone.now() - timedelta(seconds=STALE_JOB_TIMEOUT + 60)
+        dead = self.create_job(status='RUNNING', started_at=long_ago, heartbeat_at=long_ago)
+        pending = self.create_job()
+
+        with self.assertLogs('imports.jobs', 'WARNING'):
+            self.assertEqual(claim_next_job(), pending)
+        dead.refresh_from_db()
+        self.assertEqual(dead.status, 'FAILED')
+        self.assertIsNotNone(dead.finished_at)
+
+    def test_live_job_still_blocks_its_target(self):
+        self.create_job(status='RUNNING', started_at=timezone.now(), heartbeat_at=timezone.now())
+        self.create_job()
+
+        self.assertEqual(fail_stale_jobs(), 0)
+        self.assertIsNone(claim_next_job())
+
+    def test_requeue_resets_failed_jobs_only(self):
+        failed = self.create_job(status='FAILED', rows_done=10, error_message='boom', finished_at=timezone.now())
+        done = self.create_job(status='DONE')
+
+        self.assertEqual(requeue_jobs(ImportJob.objects.all()), 1)
+        failed.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual((failed.status, failed.rows_done, failed.error_message), ('PENDING', 0, ''))
+        self.assertEqual(done.status, 'DONE')
+
+    def test_job_failed_while_running_keeps_its_status(self):
+        self.create_job(upload=STOCK_FILE)
+        job = claim_next_job()
+        fail_jobs(ImportJob.objects.filter(pk=job.pk), 'Marked as failed by admin.')
+
+        with self.assertLogs('imports.jobs', 'WARNING'):
+            job = run_job(job)
+
+        self.assertEqual((job.status, job.error_message), ('FAILED', 'Marked as failed by admin.'))
+
+    def test_requeued_job_is_claimed_again_under_a_new_worker(self):
+        self.create_job()
+        first = claim_next_job()
+        fail_jobs(ImportJob.objects.filter(pk=first.pk), 'boom')
+        requeue_jobs(ImportJob.objects.all())
+
+        second = claim_next_job()
+        self.assertNotEqual(second.worker, first.worker)
+        self.assertFalse(owned_job(first).exists())
+
+
+class HeartbeatTests(JobFixtures, TransactionTestCase):
+
+    def test_heartbeat_runs_while_the_handler_reports_nothing(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        self.create_job()
+        job = claim_next_job()
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+
+        with Heartbeat(owned_job(job), interval=0.01):
+            time.sleep(0.1)
+
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, long_ago)
+        self.assertEqual(fail_stale_jobs(timeout=60), 0)
@@ -0,0 +1,11 @@
+from django.contrib import messages
+from django.shortcuts import redirect
+
+from .jobs import queue_import
+
+
+def start_import(request, target, uploaded_file):
+    # Queue an admin upload and send the user to its progress page
+    job = queue_import(request.user, target, uploaded_file)
+    messages.success(request, f"{uploaded_file.name} was uploaded and queued for import.")
+    return redirect('admin:imports_importjob_progress', job_id=job.pk)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Column dtypes of the DataFrames built by the report and offer flows.
+# 'category' for low-cardinality labels, 'string' for identifiers (UPCs keep
+# their leading zeros), 'int32'/'int16' for counts and 'cents' for money held
+# as integer cents. Columns missing from a frame are ignored.
+STOCK_FRAME_SCHEMA = {
+    'sku': 'string',
+    'upc': 'string',
+    'item_classification': 'category',
+    'description': 'string',
+    'available': 'int32',
+    'cost': 'cents',
+}
+
+MOVEMENT_FRAME_SCHEMA = {
+    'sku': 'string',
+    'qty_in': 'int32',
+    'qty_out': 'int32',
+    'balance': 'int32',
+}
+
+SLOW_MOVERS_FRAME_SCHEMA = {
+    **STOCK_FRAME_SCHEMA,
+    'brand': 'category',
+    'sellercategory': 'category',
+    'qtyin_oneyear': 'int32',
+    'qtyout_oneyear': 'int32',
+    'balance_oneyear': 'int32',
+    'begining_balance': 'int32',
+    'reference': 'int32',
+    'percentage': 'float32',
+}
+
+# Offer working frames hold money as cents for offers.pricing; the workspace rows, the
+# templates and the offer files show amounts (see amounts_from_cents)
+OFFER_FRAME_SCHEMA = {
+    'sku': 'string',
+    'upc': 'string',
+    'description': 'string',
+    'brand': 'category',
+    'item_classification': 'category',
+    'sellercategory': 'category',
+    'available': 'int32',
+    'display_qty': 'int32',
+    'qtyin_oneyear': 'int32',
+    'qtyout_oneyear': 'int32',
+    'balance_oneyear': 'int32',
+    'begining_balance': 'int32',
+    'reference': 'int32',
+    'cost': 'cents',
+    'salon': 'cents',
+    'offer_price': 'cents',
+}
+
+
+def to_cents(values):
+    # Money values (Decimal, float, str or None) as int64 cents; missing values become 0.
+    # Values with at most two decimals, as stored by DecimalField(decimal_places=2), convert exactly
+    amounts = pd.to_numeric(pd.Series(values, copy=False).astype(object), errors='coerce').fillna(0)
+    return pd.Series(np.rint(amounts.to_numpy(dtype='float64') * 100).astype('int64'), index=amounts.index)
+
+
+def from_cents(cents):
+    return pd.Series(cents, copy=False).astype('int64') / 100
+
+
+def amounts_from_cents(df, schema):
+    # Turn the 'cents' columns of `schema` present in `df` back into amounts, in place
+    for column, dtype in schema.items():
+        if dtype == 'cents' and column in df.columns:
+            df[column] = from_cents(df[column])
+    return df
+
+
+def _convert(series, dtype):
+    if dtype == 'cents':
+        # Integer columns already hold cents, so applying a schema twice is harmless
+        return series.astype('int64') if pd.api.types.is_integer_dtype(series.dtype) else to_cents(series)
+    if dtype in ('int16', 'int32', 'int64'):
+        numbers = pd.to_numeric(series, errors='coerce')
+        # Nullable integers only when the column actually has gaps
+        return numbers.astype(dtype.capitalize() if numbers.isna().any() else dtype)
+    if dtype == 'string':
+        return series.astype('string')
+    return series.astype(dtype)
+
+
+def apply_schema(df, schema):
+    # Convert the columns of `df` named in `schema` in place and return it
+    for column, dtype in schema.items():
+        if column in df.columns:
+            df[column] = _convert(df[column], dtype)
+    return df
+
+
+def fill_category(series, value):
+    # fillna for possibly categorical columns, adding `value` to the categories first
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def bytes_per_row(df):
+    return df.memory_usage(index=True, deep=True).sum() / max(len(df), 1)
+
+
+def memory_report(df, schema):
+    # Bytes per row of `df` as built from .values() and after apply_schema
+    before = bytes_per_row(df)
+    after = bytes_per_row(apply_schema(df.copy(), schema))
+    return {'rows': len(df), 'bytes_per_row_before': round(float(before), 1), 'bytes_per_row_after': round(float(after), 1)}
@@ -0,0 +1,375 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import codecs
+import csv
+import hashlib
+import io
+import logging
+import datetime
+import multiprocessing
+import os
+import zipfile
+
+from django.conf import settings
+from django.db import connections, transaction
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from home.brands import with_brand_refs
+from .models import Item, Stock
+from .skus import with_sku_parts
+
+logger = logging.getLogger(__name__)
+
+# Number of rows written per bulk_create / bulk_update statement
+IMPORT_BATCH_SIZE = getattr(settings, 'INVENTORY_IMPORT_BATCH_SIZE', 1000)
+# Files on disk at least this large are parsed by a process pool, in byte ranges of PARSE_CHUNK_BYTES
+PARSE_WORKERS = getattr(settings, 'INVENTORY_IMPORT_PARSE_WORKERS', os.cpu_count() or 1)
+PARSE_CHUNK_BYTES = getattr(settings, 'INVENTORY_IMPORT_PARSE_CHUNK_BYTES', 4 * 1024 * 1024)
+PARALLEL_PARSE_MIN_BYTES = getattr(settings, 'INVENTORY_IMPORT_PARALLEL_MIN_BYTES', 16 * 1024 * 1024)
+
+ITEM_TXT_HEADER = ['sku', 'description', 'brand', 'upc', 'unit_weight', 'price', 'classification', 'notes']
+STOCK_TXT_HEADER = ['SKU', 'UPC', 'Item Classification', 'Description', 'OnHand', 'Allocated', 'Available', 'Cost']
+INOUT_TXT_HEADER = ['SKU', 'Item Description', 'Qty in', 'Qty out', 'Balance']
+
+
+class ImportFileError(ValueError):
+    # The file as a whole cannot be imported (wrong header, bad row in an all-or-nothing import, ...)
+    pass
+
+
+def iter_batches(iterable, size):
+    # Yield lists of at most `size` elements from any iterable
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_decoded_lines(uploaded_file, encoding='utf-8'):
+    # Decode an uploaded file chunk by chunk and yield complete lines, so only one
+    # chunk and one partial line are held in memory regardless of the file size
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in uploaded_file.chunks():
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def guess_encoding(uploaded_file, encodings=('utf-8', 'ISO-8859-1')):
+    # First encoding that decodes the whole file, checked chunk by chunk; ISO-8859-1 accepts any bytes
+    for encoding in encodings[:-1]:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            for chunk in uploaded_file.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return encodings[-1]
+
+
+def check_header(row, header, file_type='TXT'):
+    if row != header:
+        raise ImportFileError(f"Invalid {file_type} header. Expected headers are: {header}")
+
+
+def read_txt_rows(uploaded_file, header, encoding='utf-8'):
+    # csv reader over the data rows of a tab-delimited export, after checking its header
+    reader = csv.reader(iter_decoded_lines(uploaded_file, encoding), delimiter='\t')
+    check_header(next(reader, None), header)
+    return reader
+
+
+def is_xlsx(uploaded_file):
+    return uploaded_file.name.lower().endswith('.xlsx')
+
+
+def xlsx_cell_text(value):
+    # Render a cell value the way it would appear in a text export, so the TXT/CSV row parsers apply unchanged
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel stores every number as a float: 12.0 -> '12'
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def xlsx_row_values(row, width):
+    # Text values of a sheet row padded or trimmed to `width`; cells past it are kept only if not blank
+    values = [xlsx_cell_text(value) for value in row]
+    while len(values) > width and not values[-1]:
+        values.pop()
+    return values + [''] * (width - len(values))
+
+
+def _iter_xlsx_rows(workbook, rows):
+    try:
+        for row in rows:
+            if any(row):
+                yield row
+    finally:
+        workbook.close()
+
+
+def read_xlsx_rows(uploaded_file, header):
+    """
+    Iterate over the data rows of the first worksheet of an xlsx upload, after checking its header.
+
+    The workbook is opened with openpyxl's read_only mode, which parses the
+    sheet XML as rows are requested instead of loading every cell, so memory
+    stays flat whatever the number of rows. Rows are lists of strings, like
+    the csv reader of read_txt_rows; blank rows are dropped.
+    """
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError):
+        raise ImportFileError("The file is not a valid XLSX workbook.")
+    rows = (xlsx_row_values(row, len(header)) for row in workbook.worksheets[0].iter_rows(values_only=True))
+    try:
+        check_header(next(rows, None), header, 'XLSX')
+    except ImportFileError:
+        workbook.close()
+        raise
+    return _iter_xlsx_rows(workbook, rows)
+
+
+def byte_ranges(path, start, chunk_bytes):
+    # (start, end) offsets of consecutive slices of the file, each ending on a line boundary
+    size = os.path.getsize(path)
+    with open(path, 'rb') as txt_file:
+        while start < size:
+            txt_file.seek(min(start + chunk_bytes, size))
+            txt_file.readline()
+            end = min(txt_file.tell(), size)
+            yield start, end
+            start = end
+
+
+# Database handles inherited by a forked parse worker, kept referenced for the life of the worker
+_inherited_connections = []
+
+
+def _detach_inherited_connections():
+    # Pool initializer, run in each forked worker. Inherited connections share their sockets with the
+    # parent, which may be inside a transaction, so closing them here would end the parent's session:
+    # they are only detached from Django (workers leave through os._exit) and never used by the worker
+    for conn in connections.all():
+        _inherited_connections.append(conn.connection)
+        conn.connection = None
+
+
+def parse_byte_range(path, start, end, parse, encoding):
+    # Runs in a pool worker: read, decode, split and parse one slice of the file.
+    # `parse` must be a module-level function so it can be sent to the worker
+    with open(path, 'rb') as txt_file:
+        txt_file.seek(start)
+        text = txt_file.read(end - start).decode(encoding)
+    return [parse(row) for row in csv.reader(io.StringIO(text, newline=''), delimiter='\t')]
+
+
+def parse_txt_in_parallel(path, header, parse, encoding='utf-8', workers=PARSE_WORKERS, chunk_bytes=PARSE_CHUNK_BYTES):
+    """
+    Yield parse(row) for every data row of a tab-delimited file, parsed by a process pool.
+
+    The file is cut into byte ranges on line boundaries; workers decode and
+    parse whole ranges while the caller consumes the results in file order,
+    so the database writes of one batch overlap with the parsing of the
+    next ones. At most two ranges per worker are in flight, which bounds
+    memory whatever the file size.
+    """
+    with open(path, 'rb') as txt_file:
+        first_line = txt_file.readline()
+        data_start = txt_file.tell()
+    check_header(next(csv.reader([first_line.decode(encoding)], delimiter='\t'), None), header)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('fork'), initializer=_detach_inherited_connections,
+    ) as executor:
+        pending = deque()
+        for start, end in byte_ranges(path, data_start, chunk_bytes):
+            pending.append(executor.submit(parse_byte_range, path, start, end, parse, encoding))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parsed_rows(uploaded_file, header, parse, encoding='utf-8'):
+    # Parsed rows of an xlsx sheet or a TXT export; large TXT files stored on disk are parsed in a process pool
+    if is_xlsx(uploaded_file):
+        return (parse(row) for row in read_xlsx_rows(uploaded_file, header))
+    try:
+        path = uploaded_file.path
+    except (AttributeError, NotImplementedError):
+        path = None
+    if PARSE_WORKERS > 1 and path and os.path.getsize(path) >= PARALLEL_PARSE_MIN_BYTES:
+        return parse_txt_in_parallel(path, header, parse, encoding)
+    return (parse(row) for row in read_txt_rows(uploaded_file, header, encoding))
+
+
+def parse_item_row(row, classifications=dict(Item.CLASSIFICATION_CHOICES)):
+    # Convert one tab-delimited row into Item field values, or None if it should be skipped
+    if len(row) != len(ITEM_TXT_HEADER):
+        return None
+    try:
+        return {
+            'sku': row[0],
+            'description': row[1],
+            'brand': row[2],
+            'upc': row[3] if row[3] else 'NO UPC',
+            'unit_weight': float(row[4]) if row[4] else 0.00,
+            'price': float(row[5]) if row[5] else 0.00,
+            'classification': row[6] if row[6] in classifications else '',
+            'notes': row[7] if len(row) > 7 else '',
+        }
+    except ValueError as e:
+        logger.warning(f"Skipping Item row {row[0]!r}: {e}")
+        return None
+
+
+def parse_stock_row(row, classifications=dict(Stock.CLASSIFICATION_CHOICES)):
+    # Convert one tab-delimited row into Stock field values, or None if it should be skipped
+    if len(row) != len(STOCK_TXT_HEADER):
+        return None
+    try:
+        return {
+            'sku': row[0],
+            'upc': row[1] if row[1] else 'NO UPC',
+            'item_classification': row[2] if row[2] in classifications else '',
+            'description': row[3],
+            'on_hand': int(row[4]) if row[4] else 0,
+            'allocated': int(row[5]) if row[5] else 0,
+            'available': int(row[6]) if row[6] else 0,
+            'cost': float(row[7]) if row[7] else 0.00,
+        }
+    except ValueError as e:
+        logger.warning(f"Skipping Stock row {row[0]!r}: {e}")
+        return None
+
+
+def row_hash(values):
+    # Signed 64-bit fingerprint of a field dict, as stored in a BigIntegerField
+    normalized = '\x1f'.join(f'{field}={values[field]!r}' for field in sorted(values))
+    digest = hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def bulk_upsert(model, rows, key='sku', batch_size=IMPORT_BATCH_SIZE, progress=None, hash_field=None):
+    """
+    Insert or update `model` rows matched on the unique `key` field.
+
+    `rows` is an iterable of field dicts (None entries are counted as skipped).
+    Each batch costs one SELECT for the existing keys plus one bulk_create and
+    one bulk_update, instead of two queries per row with update_or_create, and
+    is committed on its own so a large file never holds one giant transaction.
+
+    With `hash_field`, the row_hash of each dict is stored in that field and
+    existing rows whose stored hash matches are left untouched, so re-importing
+    a full export only writes the rows that changed.
+
+    Returns a summary dict with the created, updated, unchanged and skipped
+    counts; `progress`, if given, is called with it after each batch.
+    """
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+    for batch in iter_batches(rows, batch_size):
+        # Last occurrence of a key in the batch wins, like sequential update_or_create calls
+        values_by_key = {}
+        for values in batch:
+            if values is None:
+                summary['skipped'] += 1
+                continue
+            values_by_key[values[key]] = values
+        if not values_by_key:
+            if progress:
+                progress(summary)
+            continue
+
+        if hash_field:
+            for values in values_by_key.values():
+                values[hash_field] = row_hash(values)
+        columns = (key, 'pk', hash_field) if hash_field else (key, 'pk')
+        existing = {
+            row[0]: row[1:] for row in model.objects.filter(**{f'{key}__in': list(values_by_key)}).values_list(*columns)
+        }
+
+        to_create = []
+        to_update = []
+        for key_value, values in values_by_key.items():
+            if key_value not in existing:
+                to_create.append(model(**values))
+                continue
+            if hash_field and existing[key_value][1] == values[hash_field]:
+                summary['unchanged'] += 1
+            else:
+                to_update.append(model(pk=existing[key_value][0], **values))
+
+        update_fields = [field for field in next(iter(values_by_key.values())) if field != key]
+        with transaction.atomic():
+            if to_create:
+                model.objects.bulk_create(to_create, batch_size=batch_size)
+            if to_update and update_fields:
+                model.objects.bulk_update(to_update, update_fields, batch_size=batch_size)
+
+        summary['created'] += len(to_create)
+        summary['updated'] += len(to_update)
+        if progress:
+            progress(summary)
+
+    return summary
+
+
+def parse_inout_row(row):
+    # Convert one tab-delimited row into InOutReport field values; None for blank lines.
+    # Raises ValueError for malformed rows
+    if not ''.join(row).strip():
+        return None
+    if len(row) != len(INOUT_TXT_HEADER):
+        raise ValueError("Row length does not match the expected format.")
+    sku, item_description, qty_in, qty_out, balance = row
+    try:
+        values = {
+            'sku': sku,
+            'item_description': item_description,
+            'qty_in': int(qty_in) if qty_in else 0,
+            'qty_out': int(qty_out) if qty_out else 0,
+            'balance': int(balance) if balance else 0,
+        }
+    except ValueError:
+        raise ValueError("Invalid data format in the row.")
+    if values['qty_in'] < 0 or values['qty_out'] < 0:
+        raise ValueError("Qty in and Qty out cannot be negative.")
+    return values
+
+
+def validate_rows(rows, parse):
+    # Parse every row once without writing anything; raises ImportFileError on the first bad one
+    for line, row in enumerate(rows, start=2):  # line 1 is the header
+        try:
+            parse(row)
+        except ValueError as e:
+            raise ImportFileError(f"Line {line}: {e}")
+
+
+def import_item_file(uploaded_file, progress=None):
+    encoding = 'utf-8' if is_xlsx(uploaded_file) else guess_encoding(uploaded_file)
+    rows = with_brand_refs(with_sku_parts(parsed_rows(uploaded_file, ITEM_TXT_HEADER, parse_item_row, encoding)))
+    return bulk_upsert(Item, rows, key='sku', progress=progress, hash_field='row_hash')
+
+
+def import_stock_file(uploaded_file, progress=None):
+    rows = with_sku_parts(parsed_rows(uploaded_file, STOCK_TXT_HEADER, parse_stock_row))
+    return bulk_upsert(Stock, rows, key='sku', progress=progress, hash_field='row_hash')
+
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.importers import IMPORT_BATCH_SIZE, bulk_upsert
+from inventory.models import Stock
+from inventory.skus import with_sku_parts
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bulk_upsert with the per-row update_or_create loop it replaced on generated Stock rows. "
+        "Each run is rolled back, so nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help="Generated rows per import.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="Rows per bulk_upsert batch.")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        timings = {}
+        for label, load in [('update_or_create', self.update_or_create), ('bulk_upsert', self.bulk_upsert)]:
+            with transaction.atomic():
+                # First import, every row changed, then the same file again
+                timings[label] = [
+                    self.time(load, rows, 0, options['batch_size']),
+                    self.time(load, rows, 1, options['batch_size']),
+                    self.time(load, rows, 1, options['batch_size']),
+                ]
+                transaction.set_rollback(True)
+
+        for phase, (old, new) in zip(['create', 'update', 'unchanged'], zip(*timings.values())):
+            self.stdout.write(
+                f"{phase}: update_or_create {old:.2f}s ({rows / old:,.0f} rows/s), "
+                f"bulk_upsert {new:.2f}s ({rows / new:,.0f} rows/s), {old / new:.1f}x"
+            )
+
+    def time(self, load, rows, revision, batch_size):
+        start = time.perf_counter()
+        load(self.generate_rows(rows, revision), batch_size)
+        return time.perf_counter() - start
+
+    def generate_rows(self, rows, revision):
+        # Stock field dicts as parse_stock_row returns them; SKUs are prefixed so they never match real stock
+        return list(with_sku_parts(
+            {
+                'sku': f"BENCH-{n:08d}" + ('-TESTER' if n % 10 == 0 else ''),
+                'upc': str(100000000000 + n),
+                'item_classification': 'PERFUMES',
+                'description': f"Description {n}",
+                'on_hand': n % 500 + revision,
+                'allocated': n % 7,
+                'available': n % 493 + revision,
+                'cost': float(f"{n % 1000}.{n % 100:02d}"),
+            }
+            for n in range(rows)
+        ))
+
+    def update_or_create(self, rows, batch_size):
+        for values in rows:
+            Stock.objects.update_or_create(sku=values.pop('sku'), defaults=values)
+
+    def bulk_upsert(self, rows, batch_size):
+        bulk_upsert(Stock, rows, key='sku', batch_size=batch_size, hash_field='row_hash')
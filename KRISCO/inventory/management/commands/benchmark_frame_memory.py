@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from inventory.frames import MOVEMENT_FRAME_SCHEMA, OFFER_FRAME_SCHEMA, SLOW_MOVERS_FRAME_SCHEMA, STOCK_FRAME_SCHEMA, memory_report
+
+
+class Command(BaseCommand):
+    help = "Report the bytes per row of the report and offer frames before and after their schema, on generated rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help="Rows of each generated frame.")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        frames = [
+            ('stock', self.stock_records(rows), STOCK_FRAME_SCHEMA),
+            ('in/out', self.movement_records(rows), MOVEMENT_FRAME_SCHEMA),
+            ('slow movers', self.report_records(rows), SLOW_MOVERS_FRAME_SCHEMA),
+            ('offer', self.offer_records(rows), OFFER_FRAME_SCHEMA),
+        ]
+        for label, records, schema in frames:
+            # Built the way the flows build them: from a list of row dicts
+            report = memory_report(pd.DataFrame.from_records(records), schema)
+            before, after = report['bytes_per_row_before'], report['bytes_per_row_after']
+            self.stdout.write(
+                f"{label}: {report['rows']:,} rows, {before:.1f} -> {after:.1f} bytes/row "
+                f"({before * rows / 1024 / 1024:.1f} -> {after * rows / 1024 / 1024:.1f} MB)"
+            )
+
+    def stock_records(self, rows):
+        # As Stock.objects.values(*STOCK_COLUMNS)
+        return [
+            {
+                'sku': f"SKU{n:08d}",
+                'upc': str(100000000000 + n),
+                'item_classification': ('PERFUMES', 'MAKEUP', 'SKINCARE')[n % 3],
+                'description': f"Brand {n % 500} - Description {n}",
+                'available': n % 493,
+                'cost': Decimal(f"{n % 1000}.{n % 100:02d}"),
+            }
+            for n in range(rows)
+        ]
+
+    def movement_records(self, rows):
+        return [{'sku': f"SKU{n:08d}", 'qty_in': n % 50, 'qty_out': n % 37, 'balance': n % 20} for n in range(rows)]
+
+    def report_records(self, rows):
+        # As SlowMoversReport.objects.values(...) in the offer flow
+        return [
+            {
+                **stock,
+                'brand': f"BRAND {n % 500}",
+                'qtyin_oneyear': n % 50,
+                'qtyout_oneyear': n % 37,
+                'balance_oneyear': n % 20,
+                'begining_balance': n % 20 - n % 50 + n % 37,
+                'reference': n % 50 + n % 20,
+                'percentage': Decimal(f"{n % 100}.{n % 10}0"),
+                'sellercategory': ('Slow Seller', 'Average Seller', 'Best Seller', 'Dead Seller')[n % 4],
+            }
+            for n, stock in enumerate(self.stock_records(rows))
+        ]
+
+    def offer_records(self, rows):
+        # As the JSON rows of an offer workspace, money as amounts
+        return [
+            {
+                **report,
+                'report_date': '2024-02-18',
+                'cost': float(report['cost']),
+                'percentage': float(report['percentage']),
+                'display_qty': report['available'],
+                'discount': 10.0,
+                'offer_price': round(float(report['cost']) * 0.9, 2),
+            }
+            for report in self.report_records(rows)
+        ]
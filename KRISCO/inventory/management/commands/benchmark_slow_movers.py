@@ -0,0 +1,68 @@
+from decimal import Decimal
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.frames import MOVEMENT_FRAME_SCHEMA, apply_schema
+from inventory.reports import MOVEMENT_COLUMNS, STOCK_COLUMNS, build_slow_movers_frame, iter_report_rows
+
+
+class Command(BaseCommand):
+    help = "Time build_slow_movers_frame on generated stock and in/out frames. Nothing is read from or written to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000], help="Stock rows of each run.")
+        parser.add_argument('--movements', type=int, default=3, help="In/out rows per SKU.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        report_date = timezone.now().date()
+        for rows in options['rows']:
+            df_stock, df_in_out, brands_by_sku = self.generate_frames(rows, options['movements'])
+
+            elapsed = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                df = build_slow_movers_frame(df_stock, df_in_out, brands_by_sku)
+                elapsed.append(time.perf_counter() - start)
+            build = min(elapsed)
+
+            start = time.perf_counter()
+            for _ in iter_report_rows(df, report_date):
+                pass
+            convert = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{rows:,} SKUs / {len(df_in_out):,} movements: build_slow_movers_frame {build:.3f}s "
+                f"({rows / build:,.0f} rows/s), iter_report_rows {convert:.3f}s, "
+                f"{df.memory_usage(index=True, deep=True).sum() / 1024 / 1024:.1f} MB"
+            )
+
+    def generate_frames(self, rows, movements):
+        # Frames shaped like the .values() querysets of generate_slow_movers_report
+        n = np.arange(rows)
+        df_stock = pd.DataFrame({
+            'sku': [f"SKU{i:08d}" for i in n],
+            'upc': [str(100000000000 + i) for i in n],
+            'item_classification': np.array(['PERFUMES', 'MAKEUP', 'SKINCARE', None], dtype=object)[n % 4],
+            'description': [f"Brand {i % 500} - Description {i}" for i in n],
+            'available': n % 493,
+            'cost': [Decimal(f"{i % 1000}.{i % 100:02d}") for i in n],
+        }, columns=STOCK_COLUMNS)
+
+        # Every other SKU has movements
+        skus = np.repeat(df_stock['sku'].to_numpy()[::2], movements)
+        m = np.arange(len(skus))
+        df_in_out = apply_schema(pd.DataFrame({
+            'sku': skus,
+            'qty_in': m % 50,
+            'qty_out': m % 37,
+            'balance': m % 20,
+        }, columns=['sku'] + MOVEMENT_COLUMNS), MOVEMENT_FRAME_SCHEMA)
+
+        # Item brands for two SKUs in three
+        brands_by_sku = {sku: f"BRAND {i % 500}" for i, sku in enumerate(df_stock['sku']) if i % 3}
+        return df_stock, df_in_out, brands_by_sku
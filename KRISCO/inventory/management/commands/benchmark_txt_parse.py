@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from inventory.importers import (
+    IMPORT_BATCH_SIZE, PARSE_CHUNK_BYTES, PARSE_WORKERS, STOCK_TXT_HEADER,
+    iter_batches, parse_stock_row, parse_txt_in_parallel, read_txt_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare sequential and process pool parsing of a Stock TXT export. Nothing is written to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help="Stock TXT export to parse; a file of --lines generated rows by default.")
+        parser.add_argument('--lines', type=int, default=1000000, help="Rows of the generated file.")
+        parser.add_argument('--workers', type=int, default=PARSE_WORKERS, help="Parse processes of the pooled run.")
+        parser.add_argument('--chunk-bytes', type=int, default=PARSE_CHUNK_BYTES, help="Byte range parsed per task.")
+        parser.add_argument(
+            '--batch-delay', type=float, default=0,
+            help="Seconds to sleep per batch of parsed rows, standing in for the database write the pool overlaps with.",
+        )
+
+    def handle(self, *args, **options):
+        path = options['file']
+        generated = path is None
+        if generated:
+            path = self.generate_file(options['lines'])
+        try:
+            self.stdout.write(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+
+            def sequential():
+                with open(path, 'rb') as txt_file:
+                    yield from (parse_stock_row(row) for row in read_txt_rows(File(txt_file), STOCK_TXT_HEADER))
+
+            def pooled():
+                return parse_txt_in_parallel(path, STOCK_TXT_HEADER, parse_stock_row, workers=options['workers'], chunk_bytes=options['chunk_bytes'])
+
+            baseline = self.run('sequential', sequential(), options['batch_delay'])
+            elapsed = self.run(f"pool of {options['workers']}", pooled(), options['batch_delay'])
+            self.stdout.write(f"Speedup: {baseline / elapsed:.2f}x")
+        finally:
+            if generated:
+                os.remove(path)
+
+    def run(self, label, rows, batch_delay):
+        start = time.perf_counter()
+        count = 0
+        for batch in iter_batches(rows, IMPORT_BATCH_SIZE):
+            count += len(batch)
+            if batch_delay:
+                time.sleep(batch_delay)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{label}: {count} rows in {elapsed:.2f}s ({count / elapsed:,.0f} rows/s)")
+        return elapsed
+
+    def generate_file(self, lines):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as txt_file:
+            txt_file.write('\t'.join(STOCK_TXT_HEADER) + '\n')
+            for n in range(lines):
+                txt_file.write(f"SKU{n:08d}\t{100000000000 + n}\tPERFUMES\tDescription {n}\t{n % 500}\t{n % 7}\t{n % 493}\t{n % 1000}.{n % 100:02d}\n")
+        return txt_file.name
@@ -0,0 +1,55 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:00
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def build_summary(apps, schema_editor):
+    # Same aggregate as inventory.reports.rebuild_slow_movers_summary, against the historical models
+    SlowMoversReport = apps.get_model('inventory', 'SlowMoversReport')
+    SlowMoversSummary = apps.get_model('inventory', 'SlowMoversSummary')
+    money = DecimalField(max_digits=14, decimal_places=2)
+    offerable = Q(available__gt=0)
+    rows = (
+        SlowMoversReport.objects.order_by()
+        .values('brand', 'sellercategory', 'item_classification')
+        .annotate(
+            sku_count=Count('pk'),
+            available_sku_count=Count('pk', filter=offerable),
+            available_units=Coalesce(Sum('available', filter=offerable), 0),
+            stock_value=Coalesce(Sum(ExpressionWrapper(F('available') * F('cost'), output_field=money), filter=offerable), 0, output_field=money),
+        )
+    )
+    SlowMoversSummary.objects.bulk_create([SlowMoversSummary(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_slowmoversreport_brand'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowMoversSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_date', models.DateField(default=django.utils.timezone.now)),
+                ('brand', models.CharField(max_length=300)),
+                ('sellercategory', models.CharField(max_length=200)),
+                ('item_classification', models.CharField(max_length=200)),
+                ('sku_count', models.PositiveIntegerField(default=0)),
+                ('available_sku_count', models.PositiveIntegerField(default=0)),
+                ('available_units', models.IntegerField(default=0)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Slow Movers Summary',
+                'verbose_name_plural': 'Slow Movers Summary',
+                'unique_together': {('brand', 'sellercategory', 'item_classification')},
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
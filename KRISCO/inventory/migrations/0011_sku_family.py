@@ -0,0 +1,67 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:02
+
+import re
+
+from django.db import migrations, models
+
+# inventory.skus.SKU_SUFFIXES at the time of this migration
+SKU_SUFFIXES = ['-D', '*', '-D*', '-A', '-VD', '*D', '-NZ', '-HK', '-SING', '-R', '-X', '-NL', '-NC', 'NOBOX', '-NO BOX', '-TESTER', '-SAMPLE', '-SAMPLES', '-SAMPLER', '-SAMPLE KIT']
+SKU_VARIANT_RE = re.compile(
+    r'^(?P<base_sku>.+?)(?P<variant>(?:' + '|'.join(re.escape(suffix) for suffix in sorted(SKU_SUFFIXES, key=len, reverse=True)) + ')$)'
+)
+
+
+def fill_sku_parts(apps, schema_editor):
+    for model_name in ('Item', 'Stock', 'SlowMoversReport'):
+        model = apps.get_model('inventory', model_name)
+        batch = []
+        for row in model.objects.only('pk', 'sku').iterator():
+            match = SKU_VARIANT_RE.match(row.sku or '')
+            row.base_sku, row.variant = (match.group('base_sku'), match.group('variant')) if match else (row.sku or '', '')
+            batch.append(row)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, ['base_sku', 'variant'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['base_sku', 'variant'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_brand_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='base_sku',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='variant',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='slowmoversreport',
+            name='base_sku',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='slowmoversreport',
+            name='variant',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='base_sku',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='variant',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_sku_parts, migrations.RunPython.noop),
+    ]
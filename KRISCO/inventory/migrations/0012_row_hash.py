@@ -0,0 +1,28 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_sku_family'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inoutreport',
+            name='row_hash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='row_hash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='row_hash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_row_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InOutReportStaging',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=200, unique=True)),
+                ('item_description', models.CharField(max_length=700)),
+                ('qty_in', models.PositiveIntegerField(default=0)),
+                ('qty_out', models.PositiveIntegerField(default=0)),
+                ('balance', models.IntegerField(default=0)),
+                ('row_hash', models.BigIntegerField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'In & Out Report Staging',
+                'db_table': 'inventory_inoutreport_staging',
+            },
+        ),
+    ]
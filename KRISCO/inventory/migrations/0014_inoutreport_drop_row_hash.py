@@ -0,0 +1,21 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_inoutreport_staging'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='inoutreport',
+            name='row_hash',
+        ),
+        migrations.RemoveField(
+            model_name='inoutreportstaging',
+            name='row_hash',
+        ),
+    ]
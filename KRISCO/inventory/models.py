@@ -1,7 +1,35 @@
 from django.db import models
 from django.utils import timezone
 
-class Item(models.Model):
+from home.models import BrandReference
+from .skus import split_sku
+
+
+class SkuFamily(models.Model):
+    # Base SKU and variant suffix parsed from `sku` (see inventory.skus), kept in sync on save and import
+    base_sku = models.CharField(max_length=200, blank=True, db_index=True, editable=False)
+    variant = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.base_sku, self.variant = split_sku(self.sku)
+        super().save(*args, **kwargs)
+
+class RowFingerprint(models.Model):
+    # 64-bit hash of the imported row (see inventory.importers.row_hash); re-imports skip rows whose hash is unchanged
+    row_hash = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # A row edited outside the importer no longer matches its file row, so the next import rewrites it
+        self.row_hash = None
+        super().save(*args, **kwargs)
+
+class Item(SkuFamily, BrandReference, RowFingerprint):
     CLASSIFICATION_CHOICES = [
         ('BAGS', 'BAGS'),
         ('BAKING SODA', 'BAKING SODA'),
@@ -54,7 +82,7 @@ class Item(models.Model):
 
 
 
-class Stock(models.Model):
+class Stock(SkuFamily, RowFingerprint):
     CLASSIFICATION_CHOICES = [
         ('BAGS', 'BAGS'),
         ('BAKING SODA', 'BAKING SODA'),
@@ -102,18 +130,31 @@ class Stock(models.Model):
     def __str__(self):
         return f"{self.sku} - {self.description}"
 
-class InOutReport(models.Model):
+class InOutReportFields(models.Model):
+    # Columns shared by the live report and its staging table, which must stay identical for the table swap
     sku = models.CharField(max_length=200, unique=True)
     item_description = models.CharField(max_length=700)
     qty_in = models.PositiveIntegerField(default=0)
     qty_out = models.PositiveIntegerField(default=0)
     balance = models.IntegerField(default=0)
 
+    class Meta:
+        abstract = True
+
     def __str__(self):
         return f"{self.sku} - {self.item_description}"
 
+class InOutReport(InOutReportFields):
+    pass
 
-class SlowMoversReport(models.Model):
+class InOutReportStaging(InOutReportFields):
+    # Shadow table a new report is loaded into before it replaces InOutReport (see inventory.staging)
+    class Meta:
+        db_table = 'inventory_inoutreport_staging'
+        verbose_name = 'In & Out Report Staging'
+
+
+class SlowMoversReport(SkuFamily, BrandReference):
     CLASSIFICATION_CHOICES = [
         ('BAGS', 'BAGS'),
         ('BAKING SODA', 'BAKING SODA'),
@@ -171,4 +212,24 @@ class SlowMoversReport(models.Model):
     class Meta:
         verbose_name = 'Slow Mover Report'
         verbose_name_plural = 'Slow Movers Reports'
-        unique_together = ('report_date', 'sku')
\ No newline at end of file
+        unique_together = ('report_date', 'sku')
+
+
+class SlowMoversSummary(models.Model):
+    # Brand x seller category x classification totals of SlowMoversReport, rebuilt with the report
+    report_date = models.DateField(default=timezone.now)
+    brand = models.CharField(max_length=300)
+    sellercategory = models.CharField(max_length=200)
+    item_classification = models.CharField(max_length=200)
+    sku_count = models.PositiveIntegerField(default=0)
+    available_sku_count = models.PositiveIntegerField(default=0)
+    available_units = models.IntegerField(default=0)
+    stock_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.brand} - {self.sellercategory} - {self.item_classification}"
+
+    class Meta:
+        verbose_name = 'Slow Movers Summary'
+        verbose_name_plural = 'Slow Movers Summary'
+        unique_together = ('brand', 'sellercategory', 'item_classification')
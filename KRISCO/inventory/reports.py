@@ -0,0 +1,155 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+import logging
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from home.brands import with_brand_refs
+from .frames import MOVEMENT_FRAME_SCHEMA, SLOW_MOVERS_FRAME_SCHEMA, STOCK_FRAME_SCHEMA, apply_schema, fill_category
+from .importers import bulk_upsert
+from .skus import with_sku_parts
+from .models import InOutReport, Item, SlowMoversReport, SlowMoversSummary, Stock
+
+logger = logging.getLogger(__name__)
+
+STOCK_COLUMNS = ['sku', 'upc', 'item_classification', 'description', 'available', 'cost']
+MOVEMENT_COLUMNS = ['qty_in', 'qty_out', 'balance']
+
+# percentage is a DecimalField(max_digits=5, decimal_places=2)
+MAX_PERCENTAGE = 999.99
+
+
+def safe_decimal_conversion(value, default=Decimal(0)):
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        logger.error(f"Decimal conversion error for value: {value}")
+        return default
+
+
+def build_slow_movers_frame(df_stock, df_in_out, brands_by_sku):
+    """
+    Compute the slow movers report from the stock and in/out movement frames.
+
+    `df_stock` holds base SKUs only (Stock rows with variant ''). Every step
+    is a column operation: one grouped aggregate sums the movements and the
+    percentage, seller category and brand columns are derived with NumPy
+    instead of row-wise apply calls. The result follows
+    SLOW_MOVERS_FRAME_SCHEMA, with cost in integer cents.
+    """
+    df = apply_schema(df_stock[STOCK_COLUMNS].copy(), STOCK_FRAME_SCHEMA)
+    df['available'] = df['available'].fillna(0).astype('int64')
+    df['item_classification'] = fill_category(df['item_classification'], 'UNKNOWN')
+
+    if df_in_out.empty:
+        movements = pd.DataFrame(columns=MOVEMENT_COLUMNS, dtype='int64')
+    else:
+        movements = df_in_out.groupby('sku')[MOVEMENT_COLUMNS].sum()
+    df = df.join(movements, on='sku')
+    df[MOVEMENT_COLUMNS] = df[MOVEMENT_COLUMNS].fillna(0).astype('int64')
+    df = df.rename(columns={'qty_in': 'qtyin_oneyear', 'qty_out': 'qtyout_oneyear', 'balance': 'balance_oneyear'})
+
+    df['begining_balance'] = df['balance_oneyear'] - df['qtyin_oneyear'] + df['qtyout_oneyear']
+    df['reference'] = df['qtyin_oneyear'] + df['balance_oneyear']
+
+    qtyout = df['qtyout_oneyear'].to_numpy(dtype='float64')
+    reference = df['reference'].to_numpy(dtype='float64')
+    percentage = np.divide(qtyout * 100, reference, out=np.zeros_like(qtyout), where=reference != 0)
+    df['percentage'] = np.clip(np.round(percentage, 2), -MAX_PERCENTAGE, MAX_PERCENTAGE)
+
+    df['sellercategory'] = np.select(
+        [percentage < 20, (percentage > 20) & (percentage < 80), percentage > 80],
+        ['Slow Seller', 'Average Seller', 'Best Seller'],
+        default='Dead Seller',
+    )
+
+    # Brand comes from the Item master, falling back to the description prefix
+    description = df['description'].fillna('')
+    fallback = description.str.split('-', n=1).str[0].str.strip().where(description.str.contains('-', regex=False), 'UNKNOWN')
+    brand = df['sku'].map(brands_by_sku)
+    df['brand'] = brand.where(brand.notna() & (brand != ''), fallback)
+
+    return apply_schema(df, SLOW_MOVERS_FRAME_SCHEMA)
+
+
+def iter_report_rows(df, report_date):
+    # Yield SlowMoversReport field dicts for bulk_upsert
+    for row in df.itertuples(index=False):
+        yield {
+            'sku': row.sku,
+            'report_date': report_date,
+            'upc': row.upc,
+            'brand': row.brand,
+            'item_classification': row.item_classification,
+            'description': row.description,
+            'qtyin_oneyear': int(row.qtyin_oneyear),
+            'qtyout_oneyear': int(row.qtyout_oneyear),
+            'balance_oneyear': int(row.balance_oneyear),
+            'available': int(row.available),
+            'cost': Decimal(int(row.cost)).scaleb(-2),
+            'begining_balance': int(row.begining_balance),
+            'reference': int(row.reference),
+            'percentage': safe_decimal_conversion(row.percentage),
+            'sellercategory': row.sellercategory,
+        }
+
+
+def generate_slow_movers_report(report_date=None):
+    # Rebuild the SlowMoversReport table from Stock, InOutReport and Item; returns the bulk_upsert summary
+    report_date = report_date or timezone.now().date()
+
+    # Variant SKUs (testers, samples, ...) are excluded with the indexed variant column
+    df_stock = pd.DataFrame(list(Stock.objects.filter(variant='').values(*STOCK_COLUMNS)), columns=STOCK_COLUMNS)
+    df_in_out = pd.DataFrame(list(InOutReport.objects.values('sku', *MOVEMENT_COLUMNS)), columns=['sku'] + MOVEMENT_COLUMNS)
+    apply_schema(df_in_out, MOVEMENT_FRAME_SCHEMA)
+    brands_by_sku = dict(Item.objects.values_list('sku', 'brand'))
+
+    df = build_slow_movers_frame(df_stock, df_in_out, brands_by_sku)
+    summary = bulk_upsert(SlowMoversReport, with_brand_refs(with_sku_parts(iter_report_rows(df, report_date))), key='sku')
+    rebuild_slow_movers_summary(report_date)
+    return summary
+
+
+def rebuild_slow_movers_summary(report_date=None):
+    """
+    Replace SlowMoversSummary with one GROUP BY over SlowMoversReport.
+
+    Offerable rows (available > 0, as filter_offers selects them) are counted
+    separately so facets can show how many SKUs a selection would return.
+    """
+    report_date = report_date or timezone.now().date()
+    offerable = Q(available__gt=0)
+    rows = (
+        SlowMoversReport.objects.order_by()
+        .values('brand', 'sellercategory', 'item_classification')
+        .annotate(
+            sku_count=Count('pk'),
+            available_sku_count=Count('pk', filter=offerable),
+            available_units=Coalesce(Sum('available', filter=offerable), 0),
+            stock_value=Coalesce(Sum(
+                ExpressionWrapper(F('available') * F('cost'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+                filter=offerable,
+            ), 0, output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    with transaction.atomic():
+        SlowMoversSummary.objects.all().delete()
+        SlowMoversSummary.objects.bulk_create([SlowMoversSummary(report_date=report_date, **row) for row in rows])
+
+
+def slow_movers_facets():
+    # Offerable SKU counts per brand and per seller category, from the small summary table
+    brands = defaultdict(int)
+    sellercategories = defaultdict(int)
+    for brand, sellercategory, count in SlowMoversSummary.objects.values_list('brand', 'sellercategory', 'available_sku_count'):
+        brands[brand] += count
+        sellercategories[sellercategory] += count
+    return {
+        'brands': sorted(brands.items()),
+        'sellercategories': sorted(sellercategories.items()),
+    }
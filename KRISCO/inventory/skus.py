@@ -0,0 +1,24 @@
+import re
+
+# Variant suffixes of a base SKU (testers, samples, regional and no-box versions, ...)
+SKU_SUFFIXES = ['-D', '*', '-D*', '-A', '-VD', '*D', '-NZ', '-HK', '-SING', '-R', '-X', '-NL', '-NC', 'NOBOX', '-NO BOX', '-TESTER', '-SAMPLE', '-SAMPLES', '-SAMPLER', '-SAMPLE KIT']
+
+# One compiled matcher; the shortest base wins, so '-SAMPLE KIT' is preferred over '-SAMPLE' and '-D*' over '*'
+SKU_VARIANT_PATTERN = '(?:' + '|'.join(re.escape(suffix) for suffix in sorted(SKU_SUFFIXES, key=len, reverse=True)) + ')$'
+SKU_VARIANT_RE = re.compile(r'^(?P<base_sku>.+?)(?P<variant>' + SKU_VARIANT_PATTERN + ')')
+
+
+def split_sku(sku):
+    # (base_sku, variant) of a SKU; variant is '' for base SKUs
+    match = SKU_VARIANT_RE.match(sku or '')
+    if match is None:
+        return sku or '', ''
+    return match.group('base_sku'), match.group('variant')
+
+
+def with_sku_parts(rows, field='sku'):
+    # Add base_sku / variant to field dicts (None entries pass through) for bulk_upsert
+    for values in rows:
+        if values is not None:
+            values['base_sku'], values['variant'] = split_sku(values[field])
+        yield values
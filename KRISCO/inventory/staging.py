@@ -0,0 +1,124 @@
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Trim
+
+from .importers import INOUT_TXT_HEADER, ImportFileError, bulk_upsert, parse_inout_row, read_txt_rows
+from .models import InOutReport, InOutReportStaging
+
+logger = logging.getLogger(__name__)
+
+# Malformed rows listed individually in the summary; the rest are only counted
+MAX_ROW_ERRORS = 100
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def clear_table(model):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'TRUNCATE TABLE {_table(model)}')
+        else:
+            cursor.execute(f'DELETE FROM {_table(model)}')
+
+
+def validate_staging(staging=InOutReportStaging):
+    """
+    Set-based checks on the loaded rows, each run as one DELETE; returns the number of rows removed.
+
+    Some checks need no statement here: exact duplicate SKUs never reach the
+    table, since bulk_upsert keeps the last occurrence and sku is unique, and
+    negative quantities are rejected by parse_inout_row before the unsigned
+    qty columns would reject the whole batch. SKUs that only differ by
+    surrounding spaces are treated as duplicates of the trimmed one.
+    """
+    rows = staging.objects.annotate(trimmed_sku=Trim('sku'))
+    checks = {
+        'blank SKU': rows.filter(trimmed_sku=''),
+        'duplicate SKU': rows.exclude(sku=F('trimmed_sku')).filter(
+            Exists(staging.objects.filter(sku=OuterRef('trimmed_sku')))
+        ),
+    }
+    removed = 0
+    for check, queryset in checks.items():
+        count, _ = queryset.delete()
+        if count:
+            logger.warning(f"Removed {count} staged In & Out rows: {check}")
+        removed += count
+    return removed
+
+
+def compare_with_live(live=InOutReport, staging=InOutReportStaging):
+    # Created / updated / unchanged counts of the staged rows against the live table, in three COUNT queries
+    same_sku = live.objects.filter(sku=OuterRef('sku'))
+    same_row = same_sku.filter(**{field: OuterRef(field) for field in ('item_description', 'qty_in', 'qty_out', 'balance')})
+    total = staging.objects.count()
+    matched = staging.objects.filter(Exists(same_sku)).count()
+    unchanged = staging.objects.filter(Exists(same_row)).count()
+    return {'created': total - matched, 'updated': matched - unchanged, 'unchanged': unchanged}
+
+
+def swap_tables(live, staging):
+    """
+    Replace the rows of `live` with those of `staging` in one step.
+
+    On MySQL the two tables are exchanged with a single RENAME TABLE, which
+    is atomic; elsewhere the live rows are deleted and re-inserted from the
+    staging table inside one transaction. Readers see either the old or the
+    new rows, never a partial load.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            old = connection.ops.quote_name(f'{live._meta.db_table}_old')
+            cursor.execute(f'RENAME TABLE {_table(live)} TO {old}, {_table(staging)} TO {_table(live)}, {old} TO {_table(staging)}')
+        else:
+            columns = ', '.join(connection.ops.quote_name(field.column) for field in live._meta.concrete_fields if not field.primary_key)
+            with transaction.atomic():
+                cursor.execute(f'DELETE FROM {_table(live)}')
+                cursor.execute(f'INSERT INTO {_table(live)} ({columns}) SELECT {columns} FROM {_table(staging)}')
+
+
+def import_inout_file(uploaded_file, progress=None):
+    """
+    Replace the whole In & Out Report with the rows of a TXT export.
+
+    The rows are bulk loaded into InOutReportStaging, malformed rows are
+    skipped and reported instead of aborting the load, the staging table is
+    validated with set-based SQL and then swapped with the live table. A
+    file without any valid row leaves the current report in place.
+
+    The swap rewrites the whole table, so there is no per-row write to skip:
+    rows are not fingerprinted, and the created / updated / unchanged counts
+    come from comparing the staging table with the live one in SQL.
+    """
+    errors = []
+
+    def parsed_rows():
+        for line, row in enumerate(read_txt_rows(uploaded_file, INOUT_TXT_HEADER), start=2):  # line 1 is the header
+            if not ''.join(row).strip():
+                continue
+            try:
+                yield parse_inout_row(row)
+            except ValueError as e:
+                if len(errors) < MAX_ROW_ERRORS:
+                    errors.append((line, str(e)))
+                yield None  # counted as skipped by bulk_upsert
+
+    def report(loaded):
+        if progress:
+            progress({**loaded, 'errors': errors})
+
+    clear_table(InOutReportStaging)
+    loaded = bulk_upsert(InOutReportStaging, parsed_rows(), key='sku', progress=report)
+    removed = validate_staging()
+    summary = compare_with_live()
+    if not any(summary.values()):
+        raise ImportFileError("The file has no valid rows; the current In & Out Report was kept.")
+
+    swap_tables(InOutReport, InOutReportStaging)
+    clear_table(InOutReportStaging)
+    logger.info(f"In & Out Report replaced: {summary}")
+    return {**summary, 'skipped': loaded['skipped'] + removed, 'errors': errors}
@@ -1,3 +1,206 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase
+
+from .frames import STOCK_FRAME_SCHEMA, apply_schema, fill_category, from_cents, memory_report, to_cents
+from .importers import ImportFileError, bulk_upsert, import_stock_file, row_hash
+from .models import InOutReport, InOutReportStaging, Stock
+from .reports import build_slow_movers_frame
+from .skus import split_sku, with_sku_parts
+from .staging import import_inout_file
+
+INOUT_HEADER = b"SKU\tItem Description\tQty in\tQty out\tBalance\n"
+STOCK_HEADER = b"SKU\tUPC\tItem Classification\tDescription\tOnHand\tAllocated\tAvailable\tCost\n"
+
+
+def inout_row(sku, qty_in=1, description='item'):
+    return {'sku': sku, 'item_description': description, 'qty_in': qty_in, 'qty_out': 0, 'balance': qty_in}
+
+
+class BulkUpsertTests(TestCase):
+
+    def test_creates_updates_and_skips(self):
+        InOutReport.objects.create(**inout_row('A'))
+
+        summary = bulk_upsert(InOutReport, [inout_row('A', 5), None, inout_row('B', 2)], batch_size=2)
+
+        self.assertEqual(summary, {'created': 1, 'updated': 1, 'unchanged': 0, 'skipped': 1})
+        self.assertEqual(dict(InOutReport.objects.values_list('sku', 'qty_in')), {'A': 5, 'B': 2})
+
+    def test_last_occurrence_of_a_key_wins(self):
+        # Within one batch and across batches, like sequential update_or_create calls
+        rows = [inout_row('A', 1), inout_row('A', 2), inout_row('B', 1), inout_row('A', 3)]
+
+        bulk_upsert(InOutReport, rows, batch_size=2)
+
+        self.assertEqual(dict(InOutReport.objects.values_list('sku', 'qty_in')), {'A': 3, 'B': 1})
+
+    def test_progress_is_reported_per_batch(self):
+        reports = []
+        bulk_upsert(InOutReport, [inout_row(sku) for sku in 'ABCDE'], batch_size=2, progress=lambda summary: reports.append(summary['created']))
+        self.assertEqual(reports, [2, 4, 5])
+
+
+class RowHashTests(TestCase):
+
+    def import_lines(self, *lines):
+        return import_stock_file(ContentFile(STOCK_HEADER + b''.join(lines), name='stock.txt'))
+
+    def test_hash_ignores_key_order_but_not_values(self):
+        self.assertEqual(row_hash({'sku': 'A', 'qty_in': 1}), row_hash({'qty_in': 1, 'sku': 'A'}))
+        self.assertNotEqual(row_hash({'sku': 'A', 'qty_in': 1}), row_hash({'sku': 'A', 'qty_in': 2}))
+        self.assertNotEqual(row_hash({'sku': 'A', 'qty_in': 1}), row_hash({'sku': 'A', 'qty_in': '1'}))
+
+    def test_reimport_skips_unchanged_rows(self):
+        lines = [b"A-HK\t1\tPERFUMES\tAlpha\t5\t0\t5\t1.50\n", b"B\t2\tMAKEUP\tBeta\t3\t1\t2\t2.00\n"]
+        self.assertEqual(self.import_lines(*lines)['created'], 2)
+
+        lines[1] = b"B\t2\tMAKEUP\tBeta\t3\t1\t1\t2.00\n"
+        summary = self.import_lines(*lines)
+
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 1, 1))
+        self.assertEqual(dict(Stock.objects.values_list('sku', 'available')), {'A-HK': 5, 'B': 1})
+        self.assertEqual(Stock.objects.values_list('base_sku', 'variant').get(sku='A-HK'), ('A', '-HK'))
+
+    def test_rows_edited_outside_the_importer_are_rewritten(self):
+        line = b"A\t1\tPERFUMES\tAlpha\t5\t0\t5\t1.50\n"
+        self.import_lines(line)
+        stock = Stock.objects.get(sku='A')
+        stock.available = 99
+        stock.save()
+        self.assertIsNone(stock.row_hash)
+
+        self.assertEqual(self.import_lines(line)['updated'], 1)
+        self.assertEqual(Stock.objects.get(sku='A').available, 5)
+
+
+class InOutStagingImportTests(TestCase):
+
+    def import_lines(self, *lines):
+        return import_inout_file(ContentFile(INOUT_HEADER + b''.join(lines), name='inout.txt'))
+
+    def test_counts_come_from_the_live_table(self):
+        InOutReport.objects.create(sku='A', item_description='a', qty_in=1, qty_out=0, balance=1)
+        InOutReport.objects.create(sku='B', item_description='b', qty_in=1, qty_out=0, balance=1)
+
+        summary = self.import_lines(b"A\ta\t1\t0\t1\n", b"B\tb\t2\t0\t2\n", b"C\tc\t1\t1\t0\n")
+
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (1, 1, 1))
+        self.assertEqual(dict(InOutReport.objects.values_list('sku', 'qty_in')), {'A': 1, 'B': 2, 'C': 1})
+        self.assertFalse(InOutReportStaging.objects.exists())
+
+    def test_invalid_rows_are_skipped(self):
+        with self.assertLogs('inventory.staging', 'WARNING') as logs:
+            summary = self.import_lines(b"A\ta\t1\t0\t1\n", b" A \ta\t5\t0\t5\n", b" \tblank\t1\t0\t1\n", b"D\td\t-1\t0\t0\n")
+
+        self.assertEqual(list(InOutReport.objects.values_list('sku', 'qty_in')), [('A', 1)])
+        self.assertEqual(summary['skipped'], 3)
+        self.assertEqual(summary['errors'], [(5, 'Qty in and Qty out cannot be negative.')])
+        self.assertEqual(len(logs.records), 2)  # one per set-based check that removed rows
+
+    def test_file_without_valid_rows_keeps_the_report(self):
+        InOutReport.objects.create(sku='A', item_description='a', qty_in=1, qty_out=0, balance=1)
+
+        with self.assertRaises(ImportFileError):
+            self.import_lines(b"D\td\t-1\t0\t0\n")
+        self.assertTrue(InOutReport.objects.filter(sku='A').exists())
+
+
+class SlowMoversFrameTests(SimpleTestCase):
+
+    def build(self):
+        df_stock = pd.DataFrame.from_records([
+            {'sku': 'A', 'upc': '0001', 'item_classification': 'PERFUMES', 'description': 'Alpha', 'available': 3, 'cost': Decimal('12.34')},
+            {'sku': 'B', 'upc': '0002', 'item_classification': None, 'description': 'Beta', 'available': None, 'cost': Decimal('1.00')},
+            {'sku': 'C', 'upc': '0003', 'item_classification': 'MAKEUP', 'description': 'Brand X - Lipstick', 'available': 0, 'cost': None},
+        ])
+        df_in_out = pd.DataFrame.from_records([
+            {'sku': 'B', 'qty_in': 5, 'qty_out': 10, 'balance': 3},
+            {'sku': 'B', 'qty_in': 5, 'qty_out': 20, 'balance': 2},
+            {'sku': 'C', 'qty_in': 100, 'qty_out': 30, 'balance': 0},
+        ])
+        df = build_slow_movers_frame(df_stock, df_in_out, {'A': 'Brand A', 'B': ''})
+        return {row['sku']: row for row in df.to_dict(orient='records')}
+
+    def test_movements_are_summed_per_sku(self):
+        rows = self.build()
+        self.assertEqual(
+            [rows['B'][column] for column in ('qtyin_oneyear', 'qtyout_oneyear', 'balance_oneyear', 'begining_balance', 'reference')],
+            [10, 30, 5, 25, 15],
+        )
+        self.assertEqual([rows['A']['qtyin_oneyear'], rows['A']['reference']], [0, 0])
+
+    def test_percentage_and_seller_category(self):
+        rows = self.build()
+        self.assertEqual([round(float(rows[sku]['percentage']), 2) for sku in 'ABC'], [0.0, 200.0, 30.0])
+        self.assertEqual([rows[sku]['sellercategory'] for sku in 'ABC'], ['Slow Seller', 'Best Seller', 'Average Seller'])
+
+    def test_brand_falls_back_to_the_description_prefix(self):
+        rows = self.build()
+        self.assertEqual([rows[sku]['brand'] for sku in 'ABC'], ['Brand A', 'UNKNOWN', 'Brand X'])
+
+    def test_missing_values_and_cents(self):
+        rows = self.build()
+        self.assertEqual(rows['B']['item_classification'], 'UNKNOWN')
+        self.assertEqual(rows['B']['available'], 0)
+        self.assertEqual([rows[sku]['cost'] for sku in 'ABC'], [1234, 100, 0])
+
+
+class SplitSkuTests(SimpleTestCase):
+
+    def test_base_skus_have_no_variant(self):
+        self.assertEqual(split_sku('ABC123'), ('ABC123', ''))
+        self.assertEqual(split_sku(''), ('', ''))
+        self.assertEqual(split_sku(None), ('', ''))
+
+    def test_variant_suffix_is_split_off(self):
+        self.assertEqual(split_sku('ABC123-TESTER'), ('ABC123', '-TESTER'))
+        self.assertEqual(split_sku('ABC123NOBOX'), ('ABC123', 'NOBOX'))
+
+    def test_longest_suffix_wins(self):
+        self.assertEqual(split_sku('ABC123-SAMPLE KIT'), ('ABC123', '-SAMPLE KIT'))
+        self.assertEqual(split_sku('ABC123-D*'), ('ABC123', '-D*'))
+        self.assertEqual(split_sku('ABC123*D'), ('ABC123', '*D'))
+
+    def test_suffix_alone_is_not_a_variant(self):
+        self.assertEqual(split_sku('-TESTER'), ('-TESTER', ''))
+
+    def test_import_rows_get_their_parts(self):
+        rows = list(with_sku_parts([{'sku': 'ABC123-HK'}, None]))
+        self.assertEqual(rows, [{'sku': 'ABC123-HK', 'base_sku': 'ABC123', 'variant': '-HK'}, None])
+
+
+class FrameSchemaTests(SimpleTestCase):
+
+    def stock_frame(self):
+        return pd.DataFrame.from_records([
+            {'sku': 'A', 'upc': '0001', 'item_classification': 'PERFUMES', 'description': 'Alpha', 'available': 3, 'cost': Decimal('12.34')},
+            {'sku': 'B', 'upc': '0002', 'item_classification': 'PERFUMES', 'description': 'Beta', 'available': None, 'cost': None},
+        ])
+
+    def test_money_converts_exactly_to_cents(self):
+        self.assertEqual(list(to_cents([Decimal('0.29'), 1.15, '2.5', None])), [29, 115, 250, 0])
+        self.assertEqual(list(from_cents([29, 250])), [0.29, 2.5])
+
+    def test_schema_types_and_idempotence(self):
+        df = apply_schema(self.stock_frame(), STOCK_FRAME_SCHEMA)
+        self.assertEqual(
+            [str(df[column].dtype) for column in ('upc', 'item_classification', 'available', 'cost')],
+            ['string', 'category', 'Int32', 'int64'],
+        )
+        self.assertEqual(list(df['upc']), ['0001', '0002'])
+
+        self.assertEqual(list(apply_schema(df, STOCK_FRAME_SCHEMA)['cost']), [1234, 0])
+
+    def test_fill_category_adds_the_missing_label(self):
+        series = pd.Series(['PERFUMES', None], dtype='category')
+        self.assertEqual(list(fill_category(series, 'UNKNOWN')), ['PERFUMES', 'UNKNOWN'])
+
+    def test_memory_report_leaves_the_frame_alone(self):
+        df = self.stock_frame()
+        report = memory_report(df, STOCK_FRAME_SCHEMA)
+        self.assertEqual(report['rows'], 2)
+        self.assertEqual(df['cost'].dtype, object)
+        self.assertGreater(report['bytes_per_row_before'], report['bytes_per_row_after'])
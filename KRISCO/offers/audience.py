@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from customer.models import Customer
+
+# The session keeps the audience as filter values plus the removed customer PKs, never the customer rows
+SESSION_KEY = 'offer_audience'
+AUDIENCE_FILTERS = ['customer_rank', 'customer_type', 'customer_category']
+AUDIENCE_PAGE_SIZE = getattr(settings, 'OFFER_AUDIENCE_PAGE_SIZE', 100)
+
+
+def get_audience(request):
+    audience = request.session.get(SESSION_KEY) or {}
+    return {
+        'filters': {name: audience.get('filters', {}).get(name, []) for name in AUDIENCE_FILTERS},
+        'excluded': audience.get('excluded', {}),
+    }
+
+
+def save_audience(request, audience):
+    request.session[SESSION_KEY] = audience
+
+
+def reset_audience(request):
+    request.session.pop(SESSION_KEY, None)
+
+
+def set_filters(request, cleaned_data):
+    # Replace the filters from a valid CustomerFilterForm; removed customers stay removed
+    audience = get_audience(request)
+    audience['filters'] = {name: list(cleaned_data.get(name) or []) for name in AUDIENCE_FILTERS}
+    save_audience(request, audience)
+
+
+def exclude_customer(request, customer_pk):
+    # Removed PKs are dict keys, so removing one recipient is a single O(1) insert
+    audience = get_audience(request)
+    audience['excluded'][str(customer_pk)] = True
+    save_audience(request, audience)
+
+
+def audience_queryset(audience):
+    # The selected customers as one SQL query
+    filters = audience['filters']
+    customers = Customer.objects.all()
+    if filters['customer_rank']:
+        customers = customers.filter(customer_rank__in=filters['customer_rank'])
+    if filters['customer_type']:
+        customers = customers.filter(customer_type__in=filters['customer_type'])
+    if filters['customer_category']:
+        customers = customers.in_categories(filters['customer_category'])
+    if audience['excluded']:
+        customers = customers.exclude(pk__in=[int(pk) for pk in audience['excluded']])
+    return customers.order_by('customer_id')
+
+
+def audience_page(request):
+    # Returns (page, audience) for the current session audience, with the handler details joined in
+    audience = get_audience(request)
+    paginator = Paginator(audience_queryset(audience).with_handler(), AUDIENCE_PAGE_SIZE)
+    return paginator.get_page(request.GET.get('page')), audience
+
+
+def audience_recipients(audience):
+    # Only the columns the email dispatcher needs
+    return audience_queryset(audience).values('email', 'customer_cc_email', 'customer_bcc_email', 'staff_id')
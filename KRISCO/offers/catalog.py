@@ -0,0 +1,129 @@
+import base64
+from decimal import Decimal
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from sequences.models import Sequence, allocate
+from .models import Weekly_Offer
+
+# Every cached catalog entry embeds the current version; bumping it invalidates them all at once.
+# The version is a row of the sequences table, not a cache key, so a bump made by any web
+# process or import worker is seen by every process even with a per-process cache backend
+CATALOG_VERSION_SEQUENCE = 'offers:catalog'
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'OFFER_CATALOG_CACHE_TIMEOUT', 60 * 15)
+CATALOG_PAGE_SIZE = getattr(settings, 'OFFER_CATALOG_PAGE_SIZE', 50)
+
+
+def catalog_version():
+    # One read of the unique sequence name per request; 0 until the catalog is first written
+    version = Sequence.objects.filter(name=CATALOG_VERSION_SEQUENCE).values_list('last_value', flat=True).first()
+    return version or 0
+
+
+def bump_catalog_version():
+    # Called on every Weekly_Offer write, including queryset updates that bypass signals
+    return allocate(CATALOG_VERSION_SEQUENCE)[0]
+
+
+def catalog_queryset(brand='', category=''):
+    items = Weekly_Offer.objects.all()
+    if brand:
+        items = items.filter(brand=brand)
+    if category:
+        items = items.filter(category=category)
+    return items
+
+
+def catalog_summary(brand='', category='', version=None):
+    """
+    Facet lists and row count for a brand/category filter, cached per catalog version.
+
+    The distinct values come straight from the (brand, category) indexes
+    instead of loading every row into a Python set.
+    """
+    version = catalog_version() if version is None else version
+    key = f'offers:catalog:{version}:summary:{brand}:{category}'
+    summary = cache.get(key)
+    if summary is None:
+        items = catalog_queryset(brand, category)
+        summary = {
+            'brands': list(items.order_by('brand').values_list('brand', flat=True).distinct()),
+            'categories': list(items.order_by('category').values_list('category', flat=True).distinct()),
+            'count': items.count(),
+        }
+        cache.set(key, summary, CATALOG_CACHE_TIMEOUT)
+    return summary
+
+
+class CatalogPaginator(Paginator):
+    # Paginator that takes the row count from the cached summary instead of running COUNT(*)
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+def catalog_page(brand='', category='', page_number=None, version=None):
+    # Returns (page, summary); the page's rows are only queried when the template iterates them
+    summary = catalog_summary(brand, category, version)
+    paginator = CatalogPaginator(catalog_queryset(brand, category), CATALOG_PAGE_SIZE, summary['count'])
+    return paginator.get_page(page_number), summary
+
+
+# Fields a client may request from the JSON catalog
+CATALOG_FIELDS = ['sku', 'upc', 'description', 'brand', 'category', 'available_qty',
+                  'msrp', 'discount', 'offer_price', 'required_quantity']
+# Keyset columns: the model ordering plus id as a unique tie-breaker
+CATALOG_KEY_FIELDS = ['brand', 'category', 'offer_price', 'id']
+CATALOG_MAX_LIMIT = getattr(settings, 'OFFER_CATALOG_MAX_LIMIT', 200)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    key = [row['brand'], row['category'], str(row['offer_price']), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        brand, category, offer_price, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return brand, category, Decimal(offer_price), int(pk)
+    except (ValueError, TypeError, ArithmeticError):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+
+def keyset_page(brand='', category='', cursor=None, limit=CATALOG_PAGE_SIZE, fields=CATALOG_FIELDS):
+    """
+    One page of the catalog in (brand, category, -offer_price, id) order.
+
+    The page starts right after the row encoded in `cursor`, so each request
+    is a range scan on weekly_offer_catalog_idx whatever the page depth.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    items = catalog_queryset(brand, category).order_by('brand', 'category', '-offer_price', 'id')
+    if cursor:
+        last_brand, last_category, last_price, last_pk = decode_cursor(cursor)
+        # The redundant brand__gte bound lets the planner seek into the index; the OR alone
+        # is applied as a filter over a scan from the first row
+        items = items.filter(brand__gte=last_brand).filter(
+            Q(brand__gt=last_brand)
+            | Q(brand=last_brand, category__gt=last_category)
+            | Q(brand=last_brand, category=last_category, offer_price__lt=last_price)
+            | Q(brand=last_brand, category=last_category, offer_price=last_price, id__gt=last_pk)
+        )
+    columns = list(dict.fromkeys([*fields, *CATALOG_KEY_FIELDS]))
+    rows = list(items.values(*columns)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [{field: row[field] for field in fields} for row in rows[:limit]], next_cursor
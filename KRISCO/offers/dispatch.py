@@ -0,0 +1,230 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+import logging
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from imports.jobs import Heartbeat, JobLost, worker_id
+from staff.models import StaffEmailConfiguration
+from .models import EmailDispatchJob, EmailLog
+
+logger = logging.getLogger(__name__)
+
+# Number of SMTP connections used in parallel by one job
+EMAIL_DISPATCH_MAX_WORKERS = getattr(settings, 'EMAIL_DISPATCH_MAX_WORKERS', 4)
+# Recipients sent over one open SMTP connection before it is closed
+EMAIL_DISPATCH_CHUNK_SIZE = getattr(settings, 'EMAIL_DISPATCH_CHUNK_SIZE', 50)
+# RUNNING jobs without a heartbeat for this long are failed; the admin can queue them again
+EMAIL_DISPATCH_STALE_TIMEOUT = getattr(settings, 'EMAIL_DISPATCH_STALE_TIMEOUT', 60 * 30)
+
+
+def split_emails(value):
+    # cc/bcc columns are nullable; NaN is accepted too for frame-based callers
+    if not isinstance(value, str):
+        return []
+    return [email.strip() for email in value.split(',') if email.strip()]
+
+
+def build_recipients(customers):
+    # Reduce customer dicts (email, cc, bcc and staff_id columns) to what the worker needs to address each email
+    return [
+        {
+            'email': customer['email'],
+            'cc': split_emails(customer.get('customer_cc_email')),
+            'bcc': split_emails(customer.get('customer_bcc_email')),
+            'staff_id': customer['staff_id'],
+        }
+        for customer in customers
+    ]
+
+
+def queue_offer_emails(user, brand_offer, recipients, subject, message):
+    return EmailDispatchJob.objects.create(
+        brand_offer=brand_offer,
+        subject=subject,
+        message=message,
+        recipients=recipients,
+        total=len(recipients),
+        created_by=user,
+    )
+
+
+def fail_jobs(jobs, message):
+    # Mark RUNNING jobs of the `jobs` queryset as FAILED; returns the number of jobs changed
+    return jobs.filter(status='RUNNING').update(status='FAILED', error_message=message, finished_at=timezone.now())
+
+
+def fail_stale_jobs(timeout=EMAIL_DISPATCH_STALE_TIMEOUT):
+    # Fail RUNNING jobs whose worker stopped sending heartbeats (killed by a deploy, OOM, ...)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = EmailDispatchJob.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff))
+    failed = fail_jobs(stale, f"The email worker stopped responding for more than {timeout} seconds.")
+    if failed:
+        logger.warning(f"Failed {failed} stale email dispatch job(s)")
+    return failed
+
+
+def requeue_jobs(jobs):
+    # Queue FAILED jobs of the `jobs` queryset again; the sent and failed counters are kept,
+    # since run_job only sends to the recipients the job has not logged yet
+    return jobs.filter(status='FAILED').update(
+        status='PENDING', error_message='', worker='', started_at=None, heartbeat_at=None, finished_at=None,
+    )
+
+
+def claim_next_job():
+    # Mark the oldest pending job as running; skip_locked lets several workers run side by side
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = (
+            EmailDispatchJob.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'RUNNING'
+        job.worker = worker_id()
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def owned_job(job):
+    # The job row while it is still RUNNING under this worker's claim
+    return EmailDispatchJob.objects.filter(pk=job.pk, status='RUNNING', worker=job.worker)
+
+
+def pending_recipients(job):
+    # Recipients without an EmailLog of this job. After a requeue, the emails of a chunk that was
+    # in flight when the worker died are sent again; every other recipient gets exactly one email
+    logged = set(job.logs.values_list('recipient_email', flat=True))
+    return [recipient for recipient in job.recipients if recipient['email'] not in logged]
+
+
+def _email_log(job, recipient, attachment_name, error=None):
+    return EmailLog(
+        dispatch_job=job,
+        recipient_email=recipient['email'],
+        cc_emails=', '.join(recipient['cc']),
+        bcc_emails=', '.join(recipient['bcc']),
+        subject=job.subject,
+        message=job.message,
+        sent_attachment=attachment_name,
+        status='Failure' if error else 'Success',
+        error_message=error or '',
+    )
+
+
+def send_chunk(job, staff_config, recipients, attachment):
+    # Send a chunk of recipients of one staff member over a single SMTP connection.
+    # Runs in a worker thread, so it only builds EmailLog objects and never touches the database.
+    attachment_name, attachment_content, attachment_mimetype = attachment
+    logs = []
+    connection = get_connection(
+        host=staff_config.host,
+        port=staff_config.port,
+        username=staff_config.username,
+        password=staff_config.password,
+        use_tls=staff_config.use_tls,
+    )
+    try:
+        connection.open()
+    except Exception as e:
+        return [_email_log(job, recipient, attachment_name, str(e)) for recipient in recipients]
+
+    try:
+        for recipient in recipients:
+            try:
+                email = EmailMessage(
+                    job.subject,
+                    job.message,
+                    staff_config.username,
+                    [recipient['email']],
+                    cc=recipient['cc'],
+                    bcc=recipient['bcc'],
+                    connection=connection,
+                )
+                email.attach(attachment_name, attachment_content, attachment_mimetype)
+                email.send()
+                logs.append(_email_log(job, recipient, attachment_name))
+            except Exception as e:
+                logs.append(_email_log(job, recipient, attachment_name, str(e)))
+    finally:
+        connection.close()
+    return logs
+
+
+def _record_progress(job, logs):
+    # Raises JobLost once the claim is gone, so no further chunk is sent
+    failed = sum(1 for log in logs if log.status == 'Failure')
+    with transaction.atomic():
+        updated = owned_job(job).update(
+            sent=F('sent') + len(logs) - failed,
+            failed=F('failed') + failed,
+            heartbeat_at=timezone.now(),
+        )
+        # Emails that went out are logged even when the job was taken away meanwhile
+        EmailLog.objects.bulk_create(logs)
+    if not updated:
+        raise JobLost(f"Email dispatch job {job.pk} is no longer running under this worker")
+
+
+def run_job(job):
+    # Load the attachment once, group the pending recipients by staff SMTP configuration and send the chunks in parallel
+    status, error_message = 'DONE', ''
+    try:
+        with job.brand_offer.offer_file.open('rb') as offer_file:
+            attachment_content = offer_file.read()
+        attachment_name = os.path.basename(job.brand_offer.offer_file.name)
+        attachment_mimetype = mimetypes.guess_type(attachment_name)[0] or 'application/octet-stream'
+        attachment = (attachment_name, attachment_content, attachment_mimetype)
+
+        recipients_by_staff = defaultdict(list)
+        for recipient in pending_recipients(job):
+            recipients_by_staff[recipient['staff_id']].append(recipient)
+        staff_configs = StaffEmailConfiguration.objects.in_bulk(list(recipients_by_staff), field_name='staff_id')
+
+        missing_logs = []
+        chunks = []
+        for staff_id, recipients in recipients_by_staff.items():
+            staff_config = staff_configs.get(staff_id)
+            if staff_config is None:
+                error = f"No email configuration found for staff ID {staff_id}."
+                missing_logs.extend(_email_log(job, recipient, attachment_name, error) for recipient in recipients)
+                continue
+            for start in range(0, len(recipients), EMAIL_DISPATCH_CHUNK_SIZE):
+                chunks.append((staff_config, recipients[start:start + EMAIL_DISPATCH_CHUNK_SIZE]))
+
+        with Heartbeat(owned_job(job)):
+            if missing_logs:
+                _record_progress(job, missing_logs)
+
+            with ThreadPoolExecutor(max_workers=EMAIL_DISPATCH_MAX_WORKERS) as executor:
+                futures = [executor.submit(send_chunk, job, staff_config, recipients, attachment) for staff_config, recipients in chunks]
+                try:
+                    for future in as_completed(futures):
+                        _record_progress(job, future.result())
+                except JobLost:
+                    for future in futures:
+                        future.cancel()  # Chunks not started yet are not sent
+                    raise
+    except JobLost:
+        pass  # Reported below
+    except Exception as e:
+        logger.error(f"Email dispatch job {job.pk} failed: {e}")
+        status, error_message = 'FAILED', str(e)
+
+    # A job failed while it ran keeps that status, even if this worker got to the end
+    if not owned_job(job).update(status=status, error_message=error_message, finished_at=timezone.now()):
+        logger.warning(f"Email dispatch job {job.pk} was failed while running; its result is discarded")
+    job.refresh_from_db()
+    return job
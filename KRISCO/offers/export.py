@@ -0,0 +1,108 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from inventory.frames import OFFER_FRAME_SCHEMA, amounts_from_cents
+from .models import BrandOffer
+
+# Report columns that are not sent to customers
+OFFER_DROP_COLUMNS = ['id', 'report_date', 'item_classification', 'qtyin_oneyear', 'qtyout_oneyear',
+                      'balance_oneyear', 'available', 'begining_balance', 'reference',
+                      'percentage', 'sellercategory', 'brand_key', 'brand_ref_id',
+                      'base_sku', 'variant']
+# Salon offers show the salon price in place of the regular cost
+SALON_DROP_COLUMNS = OFFER_DROP_COLUMNS + ['cost']
+
+# Number format per (uppercased) column. UPCs are written as strings to keep their
+# leading zeros, so they get the text format rather than a zero-padded number format
+COLUMN_NUMBER_FORMATS = {
+    'UPC': '@',
+}
+
+
+def prepare_offer_frame(df, salon=False):
+    # Shape the working offer frame (money in cents) into the customer-facing layout
+    df = amounts_from_cents(df.copy(), OFFER_FRAME_SCHEMA)
+    df = df.drop(columns=SALON_DROP_COLUMNS if salon else OFFER_DROP_COLUMNS, errors='ignore')
+    renames = {'display_qty': 'available'}
+    if salon:
+        renames['salon'] = 'cost'
+    df = df.rename(columns=renames)
+    df.columns = [col.upper() for col in df.columns]
+    return df
+
+
+def column_widths(df):
+    # Width of each column from the longest header or value, computed with vectorized string lengths
+    widths = []
+    for col in df.columns:
+        values = df[col]
+        lengths = values.astype(str).str.len().where(values.notna(), 0)
+        longest = int(lengths.max()) if len(lengths) else 0
+        widths.append(max(len(str(col)), longest) + 2)
+    return widths
+
+
+def render_offer_workbook(df):
+    """
+    Render an offer frame to xlsx bytes with a write-only (streaming) worksheet.
+
+    Rows are written once and never revisited: widths come from column_widths
+    and number formats are attached per column while each row is appended.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Sheet1')
+
+    for index, width in enumerate(column_widths(df), start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    header_font = Font(bold=True)
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(worksheet, value=col)
+        cell.font = header_font
+        header.append(cell)
+    worksheet.append(header)
+
+    formats = {df.columns.get_loc(col): number_format for col, number_format in COLUMN_NUMBER_FORMATS.items() if col in df.columns}
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    for row in rows:
+        if formats:
+            row = list(row)
+            for index, number_format in formats.items():
+                cell = WriteOnlyCell(worksheet, value=row[index])
+                cell.number_format = number_format
+                row[index] = cell
+        worksheet.append(row)
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def save_offer_file(user, df, offer_type):
+    # Render the offer frame and store it as a new BrandOffer of `offer_type` ('REGULAR' or 'SALON')
+    unique_brands = '_'.join(sorted(df['brand'].unique().tolist()))
+    file_name = f"Krisco_{unique_brands}_{timezone.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx"
+    file_content = ContentFile(render_offer_workbook(prepare_offer_frame(df, salon=offer_type == 'SALON')), name=file_name)
+
+    with transaction.atomic():
+        new_offer = BrandOffer(
+            date=timezone.now().date(),
+            time=timezone.now().time(),
+            offer_type=offer_type,
+            created_by=user,
+            created_person_first_name=user.first_name,
+            created_person_last_name=user.last_name,
+            created_person_email=user.email,
+            customer_rank='DIAMOND',
+        )
+        new_offer.save()
+        new_offer.offer_file.save(file_name, file_content, save=True)
+    return new_offer
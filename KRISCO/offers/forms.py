@@ -1,7 +1,7 @@
 from django import forms
 from django.template.defaultfilters import slugify
 from customer.models import Customer, CUSTOMER_CATEGORY_CHOICES, CUSTOMER_RANK_CHOICES, CUSTOMER_TYPE_CHOICES
-from customer.models import Customer
+from .pricing import price_item
 
 class DiscountForm(forms.Form):
     def __init__(self, unique_brands, *args, **kwargs):
@@ -16,15 +16,11 @@ class DiscountForm(forms.Form):
                 max_value=100,
                 widget=forms.NumberInput(attrs={'step': '0.01'})
             )
+        self.brands = list(unique_brands)
 
-    def clean(self):
-        cleaned_data = super().clean()
-        for field_name, value in cleaned_data.items():
-            try:
-                cleaned_data[field_name] = float(value)  # Convert to float
-            except (TypeError, ValueError):
-                self.add_error(field_name, "Invalid input. Please enter a valid number.")
-        return cleaned_data
+    def brand_discounts(self):
+        # brand -> Decimal discount percent, for pricing.price_offer_frame
+        return {brand: self.cleaned_data[f"discount_{slugify(brand)}"] for brand in self.brands}
 
 
 class SalonDiscountForm(forms.Form):
@@ -41,17 +37,11 @@ class SalonDiscountForm(forms.Form):
                 max_value=100,
                 widget=forms.NumberInput(attrs={'step': '0.01'})
             )
+        self.brands = list(unique_brands)
 
-    def clean(self):
-        cleaned_data = super().clean()
-        # Convert all input values to float and validate
-        for field_name, value in cleaned_data.items():
-            if value is not None:
-                try:
-                    cleaned_data[field_name] = float(value)
-                except (TypeError, ValueError):
-                    self.add_error(field_name, "Invalid input. Please enter a valid number.")
-        return cleaned_data
+    def brand_discounts(self):
+        # brand -> Decimal additional discount percent, applied to the salon price
+        return {brand: self.cleaned_data[f"additional_discount_{slugify(brand)}"] for brand in self.brands}
 
 class EditDiscountForm(forms.Form):
 
@@ -92,8 +82,7 @@ class EditDiscountForm(forms.Form):
         
         # Calculate offer_price if both cost and discount are provided
         if cost is not None and discount is not None:
-            offer_price = cost * (1 - discount / 100)
-            cleaned_data['offer_price'] = round(offer_price, 2)  # Round to 2 decimal places
+            cleaned_data['offer_price'] = price_item(cost, discount)['offer_price']
 
         return cleaned_data
     
@@ -137,13 +126,12 @@ class EditSalonDiscountForm(forms.Form):
 
     def clean(self):
         cleaned_data = super().clean()
-        salon = cleaned_data.get('salon')
+        cost = cleaned_data.get('cost')
         discount = cleaned_data.get('discount')
 
-        # Calculate offer_price if salon and discount are provided
-        if salon is not None and discount is not None:
-            offer_price = salon * (1 - discount / 100)
-            cleaned_data['offer_price'] = round(offer_price, 2)  # Round to 2 decimal places
+        # The salon price is always half the cost; the submitted salon value is only informative
+        if cost is not None and discount is not None:
+            cleaned_data.update(price_item(cost, discount, salon=True))
         return cleaned_data
 
 class CustomerFilterForm(forms.Form):
@@ -0,0 +1,46 @@
+import csv
+
+from home.brands import with_brand_refs
+from inventory.importers import ImportFileError, bulk_upsert, is_xlsx, iter_decoded_lines, read_xlsx_rows, validate_rows
+from .catalog import bump_catalog_version
+from .models import Weekly_Offer
+
+WEEKLY_OFFER_CSV_HEADER = ['sku', 'upc', 'description', 'brand', 'category', 'available_qty',
+                           'msrp', 'discount', 'offer_price', 'required_quantity']
+
+
+def parse_weekly_offer_row(row):
+    # Convert one CSV row into Weekly_Offer field values; raises ValueError for malformed rows
+    if len(row) != len(WEEKLY_OFFER_CSV_HEADER):
+        raise ValueError("Row length does not match the expected format.")
+    return {
+        'sku': row[0],
+        'upc': int(row[1]),
+        'description': row[2],
+        'brand': row[3],
+        'category': row[4],
+        'available_qty': int(row[5]),
+        'msrp': float(row[6]),
+        'discount': float(row[7]),
+        'offer_price': float(row[8]),
+        'required_quantity': int(row[9]),
+    }
+
+
+def read_csv_rows(uploaded_file):
+    if is_xlsx(uploaded_file):
+        return read_xlsx_rows(uploaded_file, WEEKLY_OFFER_CSV_HEADER)
+    reader = csv.reader(iter_decoded_lines(uploaded_file))
+    if next(reader, None) != WEEKLY_OFFER_CSV_HEADER:
+        raise ImportFileError("Invalid CSV header.")
+    return reader
+
+
+def import_weekly_offer_file(uploaded_file, progress=None):
+    # All or nothing, as before: a malformed row rejects the file before anything is written
+    validate_rows(read_csv_rows(uploaded_file), parse_weekly_offer_row)
+    rows = (parse_weekly_offer_row(row) for row in read_csv_rows(uploaded_file))
+    summary = bulk_upsert(Weekly_Offer, with_brand_refs(rows), key='sku', progress=progress)
+    # bulk writes skip the post_save receiver that invalidates the cached catalog
+    bump_catalog_version()
+    return summary
@@ -0,0 +1,81 @@
+from decimal import Decimal
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from offers.catalog import CATALOG_PAGE_SIZE, bump_catalog_version, catalog_queryset, encode_cursor
+from offers.models import Weekly_Offer, product_category
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests per second of the weekly offers pages and JSON catalog, with Django's test client, "
+        "on generated offers. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=50000, help="Generated weekly offers.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario.")
+        parser.add_argument('--page', type=int, default=500, help="Page number of the deep page scenarios.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate_offers(options['offers'])
+            bump_catalog_version()  # bulk_create sends no post_save
+            self.run_scenarios(options)
+            transaction.set_rollback(True)
+
+    def run_scenarios(self, options):
+        client = Client()
+        page_url = reverse('offer:weekly-offers')
+        catalog_url = reverse('offer:weekly-offers-catalog')
+
+        # Each endpoint at page 1 and at the deep page: OFFSET for the HTML page, a cursor for the JSON
+        # catalog. The cursor is the row just before the deep page, so both return the same rows
+        offset = (options['page'] - 1) * CATALOG_PAGE_SIZE
+        columns = ['brand', 'category', 'offer_price', 'id']
+        last_row = catalog_queryset().order_by('brand', 'category', '-offer_price', 'id').values(*columns)[offset - 1]
+        etag = client.get(catalog_url)['ETag']
+
+        scenarios = [
+            ('page 1, cached summary', lambda: client.get(page_url)),
+            ('page 1, uncached summary', lambda: cache.clear() or client.get(page_url)),
+            (f"page {options['page']}, OFFSET", lambda: client.get(page_url, {'page': options['page']})),
+            ('JSON page 1, keyset', lambda: client.get(catalog_url)),
+            (f"JSON page {options['page']}, keyset", lambda: client.get(catalog_url, {'cursor': encode_cursor(last_row)})),
+            ('JSON page 1, If-None-Match', lambda: client.get(catalog_url, HTTP_IF_NONE_MATCH=etag)),
+        ]
+        for label, request in scenarios:
+            response = request()  # Warm up
+            if response.status_code not in (200, 304):
+                raise CommandError(f"{label}: HTTP {response.status_code}")
+            start = time.perf_counter()
+            for _ in range(options['requests']):
+                request()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label}: {options['requests'] / elapsed:,.0f} requests/s ({elapsed * 1000 / options['requests']:.1f} ms/request)")
+
+    def generate_offers(self, offers):
+        categories = [category for category, _ in product_category]
+        Weekly_Offer.objects.bulk_create(
+            (
+                Weekly_Offer(
+                    sku=f"BENCH-{n:08d}",
+                    upc=100000000000 + n,
+                    description=f"Description {n}",
+                    brand=f"BRAND {n % 200}",
+                    category=categories[n % len(categories)],
+                    available_qty=n % 100 + 1,
+                    msrp=Decimal(f"{n % 1000 + 1}.99"),
+                    discount=Decimal('10.00'),
+                    offer_price=Decimal(f"{n % 900 + 1}.50"),
+                    required_quantity=1,
+                )
+                for n in range(offers)
+            ),
+            batch_size=1000,
+        )
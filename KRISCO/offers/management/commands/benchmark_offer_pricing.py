@@ -0,0 +1,57 @@
+from decimal import Decimal
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from inventory.frames import OFFER_FRAME_SCHEMA, apply_schema
+from offers.pricing import price_offer_frame
+
+
+class Command(BaseCommand):
+    help = "Compare price_offer_frame with the per-brand .loc loop it replaced on a generated offer frame."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help="Rows of the generated offer.")
+        parser.add_argument('--brands', type=int, default=500, help="Distinct brands, each with its own discount.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per path; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        rows, brands = options['rows'], options['brands']
+        n = np.arange(rows)
+        amounts = pd.DataFrame({'brand': [f"BRAND {i}" for i in n % brands], 'cost': (n % 100000 + 1) / 100})
+        discounts = {f"BRAND {i}": Decimal(i % 40) + Decimal('0.25') for i in range(brands)}
+
+        for salon in (False, True):
+            loop = self.fastest(options['repeat'], lambda: self.brand_loop(amounts.copy(), discounts, salon))
+            cents = apply_schema(amounts.copy(), OFFER_FRAME_SCHEMA)
+            vectorized = self.fastest(options['repeat'], lambda: price_offer_frame(cents.copy(), discounts, salon=salon))
+
+            # Rows where the float loop rounds differently from the exact computation
+            expected = self.brand_loop(amounts.copy(), discounts, salon)['offer_price'].to_numpy()
+            priced = price_offer_frame(cents.copy(), discounts, salon=salon)['offer_price'].to_numpy()
+            differences = int((np.rint(expected * 100).astype('int64') != priced).sum())
+
+            self.stdout.write(
+                f"{'salon' if salon else 'regular'}: {rows:,} rows x {brands} brands, brand loop {loop:.3f}s, "
+                f"price_offer_frame {vectorized:.3f}s ({loop / vectorized:.0f}x), {differences} prices differ"
+            )
+
+    def fastest(self, repeat, run):
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            elapsed.append(time.perf_counter() - start)
+        return min(elapsed)
+
+    def brand_loop(self, df, discounts, salon):
+        # The pricing of the offer_discount views before offers.pricing: one boolean mask per brand on float amounts
+        if salon:
+            df['salon'] = df['cost'] / 2
+        for brand, percent in discounts.items():
+            rate = float(percent) / 100
+            df.loc[df['brand'] == brand, 'discount'] = round(rate * 100, 2)
+            df.loc[df['brand'] == brand, 'offer_price'] = round(df['salon' if salon else 'cost'] * (1 - rate), 2)
+        return df
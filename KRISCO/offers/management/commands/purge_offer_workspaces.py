@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from offers.workspace import WORKSPACE_MAX_AGE, purge_expired_workspaces
+
+
+class Command(BaseCommand):
+    help = "Delete offer workspaces that were abandoned before being saved or sent."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=WORKSPACE_MAX_AGE, help="Seconds without a write after which a workspace is deleted.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_workspaces(options['max_age'])
+        self.stdout.write(f"Deleted {deleted} abandoned offer workspaces.")
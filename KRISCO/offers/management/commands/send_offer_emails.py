@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from offers.dispatch import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued offer email dispatch jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when no pending job is left instead of polling.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait between polls for new jobs.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"Sending job {job.pk} to {job.total} recipients...")
+            job = run_job(job)
+            self.stdout.write(f"Job {job.pk} {job.status}: {job.sent} sent, {job.failed} failed.")
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.4 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers', '0003_emaildispatchjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='weekly_offer',
+            index=models.Index(fields=['brand', 'category', '-offer_price'], name='weekly_offer_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weekly_offer',
+            index=models.Index(fields=['category'], name='weekly_offer_category_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:01
+
+from collections import defaultdict
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def normalize_brand(name):
+    return re.sub(r'[^A-Z0-9]+', '', (name or '').upper())
+
+
+def fill_brand_references(apps, model_names):
+    # Resolve every distinct brand once (exact key, then longest key prefix) and update per brand
+    Brand = apps.get_model('home', 'Brand')
+    ids_by_key = {}
+    for pk, brand_name in Brand.objects.values_list('pk', 'brand_name'):
+        ids_by_key.setdefault(normalize_brand(brand_name), pk)
+    prefix_keys = sorted((key for key in ids_by_key if len(key) >= 3), key=len, reverse=True)
+
+    for app_label, model_name in model_names:
+        model = apps.get_model(app_label, model_name)
+        pks_by_brand = defaultdict(list)
+        for pk, brand in model.objects.values_list('pk', 'brand').iterator():
+            pks_by_brand[brand].append(pk)
+        for brand, pks in pks_by_brand.items():
+            key = normalize_brand(brand)
+            if key not in ids_by_key:
+                key = next((prefix for prefix in prefix_keys if key.startswith(prefix)), key)
+            for start in range(0, len(pks), 1000):
+                model.objects.filter(pk__in=pks[start:start + 1000]).update(brand_key=key, brand_ref_id=ids_by_key.get(key))
+
+
+def fill_offer_brands(apps, schema_editor):
+    fill_brand_references(apps, [('offers', 'Weekly_Offer')])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_brand_key'),
+        ('offers', '0004_weekly_offer_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weekly_offer',
+            name='brand_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='weekly_offer',
+            name='brand_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offers_weekly_offer_set', to='home.brand'),
+        ),
+        migrations.RunPython(fill_offer_brands, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers', '0005_weekly_offer_brand_reference'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='offerworkspace',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.4 on 2026-10-18 07:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers', '0006_offerworkspace_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaildispatchjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emaildispatchjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='dispatch_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='offers.emaildispatchjob'),
+        ),
+    ]
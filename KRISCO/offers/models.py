@@ -2,6 +2,10 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from home.models import BrandReference
 
 product_category = (
     ("Haircare", "Haircare"),
@@ -11,7 +15,7 @@ product_category = (
     ("Accessories", "Accessories"),
 )
 
-class Weekly_Offer(models.Model):
+class Weekly_Offer(BrandReference):
     sku = models.CharField(max_length=200, unique=True)
     upc = models.BigIntegerField()
     description = models.CharField(max_length=600)
@@ -27,6 +31,11 @@ class Weekly_Offer(models.Model):
         verbose_name = 'Weekly Offer'
         verbose_name_plural = 'Weekly Offers'
         ordering = ['brand', 'category', '-offer_price']
+        indexes = [
+            # Serves the brand/category filters and the default ordering of the catalog
+            models.Index(fields=['brand', 'category', '-offer_price'], name='weekly_offer_catalog_idx'),
+            models.Index(fields=['category'], name='weekly_offer_category_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} - {self.description} at ${self.offer_price}"
@@ -37,6 +46,12 @@ class Weekly_Offer(models.Model):
             self.offer_price = self.msrp - (self.msrp * (self.discount / Decimal('100.00')))
         super().save(*args, **kwargs)
 
+@receiver(post_save, sender=Weekly_Offer)
+@receiver(post_delete, sender=Weekly_Offer)
+def invalidate_offer_catalog(sender, **kwargs):
+    from .catalog import bump_catalog_version
+    bump_catalog_version()
+
 CUSTOMER_RANK_CHOICES = (
     ('DIAMOND', 'DIAMOND'),
     ('PLATINUM', 'PLATINUM'),
@@ -78,6 +93,71 @@ class EmailLog(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, help_text="Success or Failure")
     error_message = models.TextField(blank=True, help_text="Error message if sending failed.")
+    # Job that sent the email; a requeued job skips the recipients it already logged
+    dispatch_job = models.ForeignKey('EmailDispatchJob', null=True, blank=True, on_delete=models.SET_NULL, related_name='logs')
+
+    def __str__(self):
+        return f"{self.recipient_email} - {self.subject} - {'Sent' if self.status == 'Success' else 'Failed'}"
+
+class OfferWorkspace(models.Model):
+    # Server-side working set of an offer being built; the session only keeps its id
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Abandoned workspaces are purged once this is older than OFFER_WORKSPACE_MAX_AGE
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Offer workspace {self.pk} by {self.created_by}"
+
+
+class OfferWorkspaceItem(models.Model):
+    workspace = models.ForeignKey(OfferWorkspace, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveIntegerField()
+    sku = models.CharField(max_length=200)
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ('workspace', 'sku')
 
     def __str__(self):
-        return f"{self.recipient_email} - {self.subject} - {'Sent' if self.status == 'Success' else 'Failed'}"
\ No newline at end of file
+        return f"{self.workspace_id} - {self.sku}"
+
+
+class EmailDispatchJob(models.Model):
+    # Queued offer email blast, processed by the send_offer_emails management command
+    STATUS_CHOICES = [
+        ('PENDING', 'PENDING'),
+        ('RUNNING', 'RUNNING'),
+        ('DONE', 'DONE'),
+        ('FAILED', 'FAILED'),
+    ]
+    brand_offer = models.ForeignKey(BrandOffer, on_delete=models.CASCADE)
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    recipients = models.JSONField(help_text="List of recipient dicts: email, cc, bcc and staff_id.")
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Claim of the worker sending the job (see imports.jobs.worker_id); a worker only finishes jobs it still owns
+    worker = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker on a timer and after every sent chunk; a RUNNING job without recent heartbeat has lost its worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Email Dispatch Job'
+        verbose_name_plural = 'Email Dispatch Jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.subject} - {self.status} ({self.sent + self.failed}/{self.total})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('DONE', 'FAILED')
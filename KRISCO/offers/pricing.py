@@ -0,0 +1,63 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+# Discounts are held as integer hundredths of a percent, prices as integer cents,
+# so every price is computed exactly and rounded half up once
+DISCOUNT_SCALE = 100
+FULL_DISCOUNT = 100 * DISCOUNT_SCALE
+CENT = Decimal('0.01')
+
+
+def discount_units(percent):
+    # 12.345 (%) -> 1235
+    return int((Decimal(str(percent)) * DISCOUNT_SCALE).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def salon_cents(cost_cents):
+    # Half the cost, a half cent rounding up; works on ints and NumPy arrays alike
+    return (cost_cents + 1) // 2
+
+
+def discounted_cents(cents, units, halve=False):
+    # cents less `units` hundredths of a percent, halved for salon prices, with a single half-up rounding
+    scale = FULL_DISCOUNT * 2 if halve else FULL_DISCOUNT
+    return (cents * (FULL_DISCOUNT - units) + scale // 2) // scale
+
+
+def add_salon_prices(df):
+    df['salon'] = salon_cents(df['cost'].to_numpy(dtype='int64'))
+    return df
+
+
+def price_offer_frame(df, discounts, salon=False):
+    """
+    Set discount and offer_price (and salon for salon offers) on every row of `df`.
+
+    `df` is an offer working frame, with cost and the prices in integer cents
+    (see inventory.frames.OFFER_FRAME_SCHEMA). `discounts` maps brand ->
+    discount percent. The discount of each row is looked up once per distinct
+    brand (a categorical map) and the prices are computed in one vectorized
+    pass. Brands missing from `discounts` get no discount.
+    """
+    cost = df['cost'].to_numpy(dtype='int64')
+    units_by_brand = {brand: discount_units(percent) for brand, percent in discounts.items()}
+    units = df['brand'].map(units_by_brand).astype('float64').fillna(0).to_numpy(dtype='int64')
+    if salon:
+        df['salon'] = salon_cents(cost)
+    df['discount'] = units / DISCOUNT_SCALE
+    # The salon offer price is taken from the cost, not from the already rounded salon price
+    df['offer_price'] = discounted_cents(cost, units, halve=salon)
+    return df
+
+
+def price_item(cost, discount, salon=False):
+    # Single-row version of price_offer_frame for the edit views; returns Decimals rounded to cents
+    cost_cents = int((Decimal(str(cost)) / CENT).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    units = discount_units(discount)
+    prices = {
+        'cost': Decimal(cost_cents) * CENT,
+        'discount': Decimal(units) / DISCOUNT_SCALE,
+        'offer_price': Decimal(discounted_cents(cost_cents, units, halve=salon)) * CENT,
+    }
+    if salon:
+        prices['salon'] = Decimal(salon_cents(cost_cents)) * CENT
+    return prices
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from functools import reduce
+import json
+import operator
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+
+from .catalog import bump_catalog_version
+from .models import Weekly_Offer
+
+
+class QuantityConflict(Exception):
+    # A guarded quantity update matched fewer rows than expected; the transaction is rolled back
+    pass
+
+
+def order_lines(order):
+    # Total entered quantity per SKU of an order
+    data = order.order_data
+    if isinstance(data, str):
+        data = json.loads(data)
+    lines = defaultdict(int)
+    for item in data:
+        lines[item.get('sku')] += int(item.get('entered_quantity') or 0)
+    return dict(lines)
+
+
+def lock_offers(skus):
+    # Lock every affected Weekly_Offer row in one query; a stable SKU order keeps concurrent lockers deadlock-free
+    offers = Weekly_Offer.objects.select_for_update().filter(sku__in=sorted(skus)).order_by('sku')
+    return {offer.sku: offer for offer in offers}
+
+
+def apply_quantity_changes(changes):
+    # Apply {sku: delta} to available_qty with a single UPDATE ... CASE statement.
+    # Decrements are guarded with available_qty >= quantity so stock can never go negative.
+    changes = {sku: delta for sku, delta in changes.items() if delta}
+    if not changes:
+        return 0
+    guards = [Q(sku=sku, available_qty__gte=-delta) if delta < 0 else Q(sku=sku) for sku, delta in changes.items()]
+    updated = Weekly_Offer.objects.filter(reduce(operator.or_, guards)).update(
+        available_qty=Case(
+            *[When(sku=sku, then=F('available_qty') + delta) for sku, delta in changes.items()],
+            output_field=models.PositiveIntegerField(),
+        )
+    )
+    if updated != len(changes):
+        raise QuantityConflict(f"Expected to update {len(changes)} offers, updated {updated}.")
+    # Queryset updates skip the post_save signal, so the cached catalog is invalidated here
+    transaction.on_commit(bump_catalog_version)
+    return updated
+
+
+def adjust_order_quantities(orders, subtract=True):
+    """
+    Reserve (subtract=True) or release (subtract=False) the quantities of several orders at once.
+
+    All SKUs of all orders are locked in one query and each order is validated
+    as a whole against the quantities left by the orders before it, so an order
+    is either fully applied or not at all. Returns the list of applied orders
+    and a dict of {order: error message} for the rejected ones.
+    """
+    orders = list(orders)
+    with transaction.atomic():
+        lines_by_order = {order.pk: order_lines(order) for order in orders}
+        skus = set()
+        for lines in lines_by_order.values():
+            skus.update(lines)
+        offers = lock_offers(skus)
+        remaining = {sku: offer.available_qty for sku, offer in offers.items()}
+
+        applied = []
+        failures = {}
+        changes = defaultdict(int)
+        for order in orders:
+            lines = lines_by_order[order.pk]
+            missing = [sku for sku in lines if sku not in offers]
+            if missing:
+                failures[order] = f"Weekly offer with SKU {missing[0]} does not exist."
+                continue
+            if subtract:
+                short = [sku for sku, quantity in lines.items() if remaining[sku] < quantity]
+                if short:
+                    failures[order] = f"Not enough quantity for SKU {short[0]}."
+                    continue
+
+            sign = -1 if subtract else 1
+            for sku, quantity in lines.items():
+                remaining[sku] += sign * quantity
+                changes[sku] += sign * quantity
+            applied.append(order)
+
+        apply_quantity_changes(changes)
+    return applied, failures
+
+
+def reserve_cart(lines):
+    """
+    Reserve {sku: quantity} for a shopper's cart in one transaction.
+
+    SKUs with enough stock are decremented together; the others are left
+    untouched. Returns {sku: result} where each result reports whether the
+    SKU was reserved and, if not, how many units are missing.
+    """
+    with transaction.atomic():
+        offers = lock_offers(lines)
+        results = {}
+        changes = {}
+        for sku, quantity in lines.items():
+            available = offers[sku].available_qty if sku in offers else 0
+            if quantity <= 0:
+                results[sku] = {'reserved': False, 'quantity': quantity, 'available': available, 'shortfall': 0, 'error': 'Invalid quantity'}
+            elif sku not in offers:
+                results[sku] = {'reserved': False, 'quantity': quantity, 'available': 0, 'shortfall': quantity, 'error': 'Offer not found'}
+            elif available < quantity:
+                results[sku] = {'reserved': False, 'quantity': quantity, 'available': available, 'shortfall': quantity - available}
+            else:
+                changes[sku] = -quantity
+                results[sku] = {'reserved': True, 'quantity': quantity, 'available': available - quantity, 'shortfall': 0}
+        apply_quantity_changes(changes)
+    return results
@@ -1,5 +1,7 @@
 from django import template
 
+from inventory.reports import slow_movers_facets
+
 register = template.Library()
 
 @register.filter
@@ -30,6 +32,16 @@ def unique_seller_categories(queryset):
     return sorted(unique_categories)
 
 
+@register.simple_tag
+def slow_movers_brands():
+    # All brands of the slow movers report, read from its precomputed summary: {% slow_movers_brands as brands %}
+    return [brand for brand, count in slow_movers_facets()['brands']]
+
+@register.simple_tag
+def slow_movers_seller_categories():
+    return [sellercategory for sellercategory, count in slow_movers_facets()['sellercategories']]
+
+
 @register.filter
 def get_brand_field(brand_discount_fields, brand):
     return brand_discount_fields.get(brand, "")
\ No newline at end of file
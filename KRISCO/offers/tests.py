@@ -1,3 +1,337 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+import threading
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from staff.models import StaffEmailConfiguration
+from . import reservations
+from .catalog import InvalidCursor, bump_catalog_version, catalog_summary, catalog_version, keyset_page
+from .dispatch import EMAIL_DISPATCH_STALE_TIMEOUT, build_recipients, claim_next_job, fail_jobs, queue_offer_emails, requeue_jobs, run_job
+from .export import prepare_offer_frame, render_offer_workbook
+from .models import BrandOffer, EmailDispatchJob, EmailLog, OfferWorkspace, OfferWorkspaceItem, Weekly_Offer
+from .pricing import discount_units, discounted_cents, price_item, price_offer_frame, salon_cents
+from .reservations import QuantityConflict, apply_quantity_changes, reserve_cart
+from .workspace import WORKSPACE_MAX_AGE, create_workspace, frame_records, load_frame, purge_expired_workspaces, save_frame, update_item
+
+
+def create_offer(sku='SKU1', available_qty=10):
+    return Weekly_Offer.objects.create(
+        sku=sku, upc=123456789012, description='Test', brand='BRAND', category='Makeup',
+        available_qty=available_qty, msrp=Decimal('20.00'), discount=Decimal('10.00'),
+        offer_price=Decimal('18.00'), required_quantity=1,
+    )
+
+
+class CatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_summary_is_cached_until_the_version_is_bumped(self):
+        create_offer('A')
+        self.assertEqual(catalog_summary()['count'], 1)
+
+        Weekly_Offer.objects.bulk_create([Weekly_Offer(**{**Weekly_Offer.objects.values().get(sku='A'), 'id': None, 'sku': 'B'})])
+        with self.assertNumQueries(1):  # the version read only
+            self.assertEqual(catalog_summary()['count'], 1)
+
+        bump_catalog_version()
+        self.assertEqual(catalog_summary(), {'brands': ['BRAND'], 'categories': ['Makeup'], 'count': 2})
+
+    def test_offer_writes_bump_the_version(self):
+        version = catalog_version()
+        create_offer()
+        self.assertGreater(catalog_version(), version)
+
+    def test_keyset_pages_cover_the_catalog_once(self):
+        for n in range(5):
+            create_offer(f'SKU{n}')
+
+        skus, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(cursor=cursor, limit=2, fields=['sku'])
+            skus += [row['sku'] for row in rows]
+            if cursor is None:
+                break
+        self.assertEqual(sorted(skus), [f'SKU{n}' for n in range(5)])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_page(cursor='not-a-cursor')
+
+
+class CatalogETagTests(TestCase):
+
+    def get_catalog(self, **headers):
+        return self.client.get(reverse('offer:weekly-offers-catalog'), **headers)
+
+    def test_unchanged_catalog_is_not_modified(self):
+        etag = self.get_catalog()['ETag']
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_version_bump_changes_etag(self):
+        etag = self.get_catalog()['ETag']
+        bump_catalog_version()
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_offer_write_changes_etag(self):
+        etag = self.get_catalog()['ETag']
+        create_offer()
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['sku'], 'SKU1')
+
+
+class ReservationConcurrencyTests(TransactionTestCase):
+
+    def available(self, sku='SKU1'):
+        return Weekly_Offer.objects.get(sku=sku).available_qty
+
+    def test_guarded_update_rejects_a_stale_decrement(self):
+        create_offer(available_qty=10)
+        apply_quantity_changes({'SKU1': -6})
+
+        # A second reservation validated against the same stale 10 units
+        with self.assertRaises(QuantityConflict):
+            apply_quantity_changes({'SKU1': -6})
+        self.assertEqual(self.available(), 4)
+
+    def test_overlapping_reservations_cannot_oversell(self):
+        offer = create_offer(available_qty=10)
+        stale_offers = {'SKU1': Weekly_Offer.objects.get(pk=offer.pk)}
+        self.assertTrue(reserve_cart({'SKU1': 6})['SKU1']['reserved'])
+
+        # The second cart read its offers before the first one committed: without row locks it would
+        # see 10 units, so the guarded UPDATE is what stops it and its transaction is rolled back
+        with mock.patch.object(reservations, 'lock_offers', return_value=stale_offers):
+            with self.assertRaises(QuantityConflict):
+                reserve_cart({'SKU1': 6})
+        self.assertEqual(self.available(), 4)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_reservations_are_serialized(self):
+        create_offer(available_qty=10)
+        barrier = threading.Barrier(2)
+        results = []
+
+        def reserve():
+            try:
+                barrier.wait()
+                results.append(reserve_cart({'SKU1': 6})['SKU1']['reserved'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reserve) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False, True])
+        self.assertEqual(self.available(), 4)
+
+
+class PricingTests(SimpleTestCase):
+
+    def test_discount_units_round_half_up(self):
+        self.assertEqual(discount_units(12.345), 1235)
+        self.assertEqual(discount_units('10'), 1000)
+
+    def test_salon_cents_rounds_half_a_cent_up(self):
+        self.assertEqual(salon_cents(1001), 501)
+        self.assertEqual(salon_cents(1000), 500)
+
+    def test_discounted_cents_rounds_half_up(self):
+        self.assertEqual(discounted_cents(1001, 1000), 901)  # 900.9
+        self.assertEqual(discounted_cents(1005, 5000), 503)  # 502.5
+        self.assertEqual(discounted_cents(1000, 0), 1000)
+
+    def test_salon_offer_price_is_rounded_once(self):
+        # 10.01 / 2 * 0.9 = 4.5045; rounding the salon price first would give 5.01 * 0.9 = 4.509 -> 4.51
+        self.assertEqual(discounted_cents(1001, 1000, halve=True), 450)
+        self.assertEqual(price_item('10.01', 10, salon=True), {
+            'cost': Decimal('10.01'), 'discount': Decimal('10'), 'offer_price': Decimal('4.50'), 'salon': Decimal('5.01'),
+        })
+
+    def test_price_offer_frame_matches_price_item(self):
+        df = pd.DataFrame({'brand': ['A', 'B', 'A'], 'cost': [1001, 333, 1999]})
+        price_offer_frame(df, {'A': Decimal('12.5')}, salon=True)
+        for row in df.to_dict(orient='records'):
+            prices = price_item(Decimal(row['cost']) / 100, row['discount'], salon=True)
+            self.assertEqual(Decimal(row['offer_price']) / 100, prices['offer_price'])
+            self.assertEqual(Decimal(row['salon']) / 100, prices['salon'])
+        self.assertEqual(df['discount'].tolist(), [12.5, 0.0, 12.5])
+
+
+class OfferExportTests(SimpleTestCase):
+
+    def offer_frame(self):
+        return pd.DataFrame.from_records([
+            {'id': 1, 'sku': 'A-HK', 'upc': '0001', 'brand': 'Brand', 'brand_key': 'BRAND', 'brand_ref_id': 3,
+             'base_sku': 'A', 'variant': '-HK', 'description': 'Alpha', 'available': 7, 'display_qty': 5,
+             'cost': 1000, 'salon': 1250, 'sellercategory': 'Slow Seller'},
+            {'id': 2, 'sku': 'B', 'upc': None, 'brand': 'Brand', 'brand_key': 'BRAND', 'brand_ref_id': 3,
+             'base_sku': 'B', 'variant': '', 'description': 'Beta', 'available': 1, 'display_qty': 1,
+             'cost': 200, 'salon': 250, 'sellercategory': 'Best Seller'},
+        ])
+
+    def test_customer_file_keeps_only_offer_columns(self):
+        df = prepare_offer_frame(self.offer_frame())
+        self.assertEqual(list(df.columns), ['SKU', 'UPC', 'BRAND', 'DESCRIPTION', 'AVAILABLE', 'COST', 'SALON'])
+        self.assertEqual(list(df['AVAILABLE']), [5, 1])
+        self.assertEqual(list(df['COST']), [10.0, 2.0])
+
+    def test_salon_file_shows_the_salon_price_as_cost(self):
+        df = prepare_offer_frame(self.offer_frame(), salon=True)
+        self.assertEqual(list(df.columns), ['SKU', 'UPC', 'BRAND', 'DESCRIPTION', 'AVAILABLE', 'COST'])
+        self.assertEqual(list(df['COST']), [12.5, 2.5])
+
+    def test_workbook_round_trips(self):
+        workbook = load_workbook(BytesIO(render_offer_workbook(prepare_offer_frame(self.offer_frame(), salon=True))))
+        worksheet = workbook['Sheet1']
+        self.assertEqual([list(row) for row in worksheet.iter_rows(values_only=True)], [
+            ['SKU', 'UPC', 'BRAND', 'DESCRIPTION', 'AVAILABLE', 'COST'],
+            ['A-HK', '0001', 'Brand', 'Alpha', 5, 12.5],
+            ['B', None, 'Brand', 'Beta', 1, 2.5],
+        ])
+        self.assertEqual(worksheet['B2'].number_format, '@')
+        self.assertTrue(worksheet['A1'].font.bold)
+
+
+class WorkspaceExpiryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+
+    def create_workspace(self):
+        request = RequestFactory().get('/')
+        request.session = {}
+        request.user = self.user
+        return create_workspace(request, pd.DataFrame({'sku': ['A', 'B'], 'cost': [1.0, 2.0]}))
+
+    def age(self, workspace, seconds):
+        OfferWorkspace.objects.filter(pk=workspace.pk).update(updated_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_abandoned_workspaces_are_purged_with_their_items(self):
+        abandoned = self.create_workspace()
+        current = self.create_workspace()
+        self.age(abandoned, WORKSPACE_MAX_AGE + 60)
+
+        self.assertEqual(purge_expired_workspaces(), 1)
+        self.assertEqual(list(OfferWorkspace.objects.values_list('pk', flat=True)), [current.pk])
+        self.assertFalse(OfferWorkspaceItem.objects.filter(workspace_id=abandoned.pk).exists())
+
+    def test_edits_keep_a_workspace_alive(self):
+        workspace = self.create_workspace()
+        self.age(workspace, WORKSPACE_MAX_AGE + 60)
+
+        update_item(workspace, 'A', {'cost': 3.0})
+        self.assertEqual(purge_expired_workspaces(), 0)
+
+
+class WorkspaceFrameTests(TestCase):
+
+    def test_money_is_cents_in_frames_and_amounts_in_records(self):
+        request = RequestFactory().get('/')
+        request.session = {}
+        request.user = User.objects.create_user('buyer')
+        workspace = create_workspace(request, pd.DataFrame({
+            'sku': ['A', 'B'], 'brand': ['X', 'Y'], 'cost': [Decimal('10.01'), Decimal('3.30')],
+        }))
+        self.assertEqual([item.data['cost'] for item in workspace.items.order_by('position')], [10.01, 3.3])
+
+        df = load_frame(workspace)
+        self.assertEqual(df['cost'].tolist(), [1001, 330])
+        save_frame(workspace, price_offer_frame(df, {'X': 10}))
+
+        records = frame_records(load_frame(workspace))
+        self.assertEqual([(row['cost'], row['offer_price']) for row in records], [(10.01, 9.01), (3.3, 3.3)])
+        self.assertEqual(prepare_offer_frame(load_frame(workspace))['OFFER_PRICE'].tolist(), [9.01, 3.3])
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailDispatchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('sender')
+        self.staff = StaffEmailConfiguration.objects.create(first_name='Sam', last_name='Sales', username='sam@example.com', password='secret')
+        self.offer = BrandOffer.objects.create(
+            date=timezone.now().date(), time=timezone.now().time(), offer_type='REGULAR',
+            offer_file=ContentFile(b'xlsx bytes', name='offer.xlsx'), created_by=self.user,
+            created_person_first_name='Sam', created_person_last_name='Sales', created_person_email='sam@example.com',
+            customer_rank='A',
+        )
+
+    def queue(self, *emails):
+        customers = [{'email': email, 'staff_id': self.staff.staff_id} for email in emails]
+        return queue_offer_emails(self.user, self.offer, build_recipients(customers), 'Offer', 'Please find the offer attached.')
+
+    def dispatch(self, customers):
+        queue_offer_emails(self.user, self.offer, build_recipients(customers), 'Offer', 'Please find the offer attached.')
+        return run_job(claim_next_job())
+
+    def test_each_recipient_gets_the_offer_from_its_staff_account(self):
+        job = self.dispatch([
+            {'email': 'a@example.com', 'customer_cc_email': 'boss@example.com, ', 'customer_bcc_email': None, 'staff_id': self.staff.staff_id},
+            {'email': 'b@example.com', 'customer_cc_email': None, 'customer_bcc_email': 'audit@example.com', 'staff_id': self.staff.staff_id},
+        ])
+
+        self.assertEqual((job.status, job.sent, job.failed), ('DONE', 2, 0))
+        sent = sorted(mail.outbox, key=lambda email: email.to)
+        self.assertEqual([(email.to, email.cc, email.bcc) for email in sent], [
+            (['a@example.com'], ['boss@example.com'], []),
+            (['b@example.com'], [], ['audit@example.com']),
+        ])
+        self.assertEqual({email.from_email for email in sent}, {'sam@example.com'})
+        self.assertTrue(all(email.attachments[0][1] == b'xlsx bytes' for email in sent))
+        self.assertEqual(EmailLog.objects.filter(status='Success').count(), 2)
+
+    def test_recipients_without_staff_configuration_are_logged_as_failures(self):
+        job = self.dispatch([{'email': 'c@example.com', 'staff_id': 'UNKNOWN'}])
+
+        self.assertEqual((job.status, job.sent, job.failed), ('DONE', 0, 1))
+        self.assertEqual(mail.outbox, [])
+        self.assertIn('UNKNOWN', EmailLog.objects.get(recipient_email='c@example.com').error_message)
+
+    def test_requeued_stale_job_sends_only_its_remaining_recipients(self):
+        job = self.queue('a@example.com', 'b@example.com')
+        # The worker sent and logged a's chunk, then died
+        long_ago = timezone.now() - timedelta(seconds=EMAIL_DISPATCH_STALE_TIMEOUT + 60)
+        EmailDispatchJob.objects.filter(pk=job.pk).update(status='RUNNING', sent=1, started_at=long_ago, heartbeat_at=long_ago)
+        EmailLog.objects.create(dispatch_job=job, recipient_email='a@example.com', subject='Offer', message='', sent_attachment='offer.xlsx', status='Success')
+
+        with self.assertLogs('offers.dispatch', 'WARNING'):
+            self.assertIsNone(claim_next_job())
+        self.assertEqual(EmailDispatchJob.objects.get(pk=job.pk).status, 'FAILED')
+
+        self.assertEqual(requeue_jobs(EmailDispatchJob.objects.all()), 1)
+        job = run_job(claim_next_job())
+
+        self.assertEqual([email.to for email in mail.outbox], [['b@example.com']])
+        self.assertEqual((job.status, job.sent, job.failed), ('DONE', 2, 0))
+
+    def test_job_failed_while_sending_keeps_its_status(self):
+        self.queue('a@example.com')
+        job = claim_next_job()
+        fail_jobs(EmailDispatchJob.objects.filter(pk=job.pk), 'Marked as failed by admin.')
+
+        with self.assertLogs('offers.dispatch', 'WARNING'):
+            job = run_job(job)
+
+        self.assertEqual((job.status, job.error_message), ('FAILED', 'Marked as failed by admin.'))
+        self.assertEqual(EmailLog.objects.get().dispatch_job, job)  # The email that went out is still logged
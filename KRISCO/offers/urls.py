@@ -6,6 +6,7 @@ from . import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('weekly-offers/', WeeklyOffersView.as_view(), name='weekly-offers'),
+    path('weekly-offers/catalog/', views.weekly_offers_catalog, name='weekly-offers-catalog'),
     path('weekly-offers/add-to-preview/', AddToPreviewView.as_view(), name='add-to-preview'),
     path('update-quantity/', update_quantity_view, name='update-quantity'),
     path('submit-preview/', SubmitPreviewView.as_view(), name='submit-preview'),  # Add this line
@@ -5,6 +5,9 @@ from django.http import JsonResponse
 from .models import *
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import etag, require_GET
+import hashlib
 from django.core.exceptions import ObjectDoesNotExist
 import json
 from django.core.mail import EmailMessage
@@ -17,6 +20,12 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 import pandas as pd
 
 from order.models import Order
+from sequences.models import allocate
+from .catalog import (
+    CATALOG_CACHE_TIMEOUT, CATALOG_FIELDS, CATALOG_MAX_LIMIT, CATALOG_PAGE_SIZE,
+    InvalidCursor, catalog_page, catalog_version, keyset_page,
+)
+from .reservations import reserve_cart
 
 logger = logging.getLogger(__name__)
 
@@ -27,34 +36,74 @@ class WeeklyOffersView(View):
         brand = request.GET.get('brand', '')
         category = request.GET.get('category', '')
 
-        items = Weekly_Offer.objects.all()
-        if brand:
-            items = items.filter(brand=brand)
-        if category:
-            items = items.filter(category=category)
-
-        unique_brands = set(items.values_list('brand', flat=True))
-        unique_categories = set(items.values_list('category', flat=True))
+        version = catalog_version()
+        page_obj, summary = catalog_page(brand, category, request.GET.get('page'), version)
 
         context = {
-            'items': items,
-            'unique_brands': unique_brands,
-            'unique_categories': unique_categories,
+            'page_obj': page_obj,
+            'items': page_obj.object_list,
+            'unique_brands': summary['brands'],
+            'unique_categories': summary['categories'],
+            'selected_brand': brand,
+            'selected_category': category,
+            'catalog_version': version,
+            'catalog_cache_timeout': CATALOG_CACHE_TIMEOUT,
         }
         return render(request, self.template_name, context)
 
+def catalog_etag(request):
+    # Any catalog write bumps the version, so (version, query) identifies the response
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+    return f'catalog-{catalog_version()}-{query}'
+
+@require_GET
+@gzip_page
+@etag(catalog_etag)
+def weekly_offers_catalog(request):
+    """
+    JSON catalog of weekly offers, one keyset page at a time.
+
+    Query parameters: brand, category, cursor (the next_cursor of the previous
+    page), limit and fields (comma separated subset of CATALOG_FIELDS).
+    """
+    brand = request.GET.get('brand', '')
+    category = request.GET.get('category', '')
+
+    fields = [field for field in request.GET.get('fields', '').split(',') if field] or CATALOG_FIELDS
+    unknown = [field for field in fields if field not in CATALOG_FIELDS]
+    if unknown:
+        return JsonResponse({'success': False, 'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', CATALOG_PAGE_SIZE)), 1), CATALOG_MAX_LIMIT)
+        items, next_cursor = keyset_page(brand, category, request.GET.get('cursor'), limit, fields)
+    except ValueError as e:
+        error = str(e) if isinstance(e, InvalidCursor) else 'Invalid limit'
+        return JsonResponse({'success': False, 'error': error}, status=400)
+
+    return JsonResponse({'success': True, 'items': items, 'next_cursor': next_cursor})
+
 class AddToPreviewView(View):
     def post(self, request, *args, **kwargs):
         data = json.loads(request.body.decode('utf-8'))
-        columns = ['SKU', 'UPC', 'Description', 'Quantity', 'Price']
-        df = pd.DataFrame(data, columns=columns)
 
-        for index, row in df.iterrows():
-            sku = row['SKU']
-            entered_quantity = int(row['Quantity'])
-            Weekly_Offer.objects.filter(sku=sku).update(available_qty=models.F('available_qty') - entered_quantity)
-
-        return JsonResponse({'success': True})
+        # Rows come either as objects keyed by column name or as lists in column order
+        columns = ['SKU', 'UPC', 'Description', 'Quantity', 'Price']
+        lines = {}
+        try:
+            for row in data:
+                if not isinstance(row, dict):
+                    row = dict(zip(columns, row))
+                lines[row['SKU']] = lines.get(row['SKU'], 0) + int(row['Quantity'])
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Invalid cart data'}, status=400)
+
+        # Reserve the whole cart in one transaction; SKUs short on stock are reported back
+        results = reserve_cart(lines)
+        return JsonResponse({
+            'success': all(result['reserved'] for result in results.values()),
+            'items': results,
+        })
 
 def update_quantity_view(request):
     if request.method == 'POST':
@@ -81,8 +130,8 @@ class SubmitPreviewView(View):
             # Convert the data to a pandas DataFrame (assuming 'data' has the appropriate structure)
             dataframe = pd.DataFrame(data['previewData'])
 
-            # Generate a unique order ID using the current timestamp
-            order_id = f'ORDER-ID :- {timezone.now().strftime("%Y%m%d%H%M%S")}'
+            # Timestamp for readability, sequence suffix for uniqueness within the same second
+            order_id = f'ORDER-ID :- {timezone.now().strftime("%Y%m%d%H%M%S")}-{allocate("order")[0]:06}'
 
             # Convert DataFrame to a dictionary for JSON storage
             order_data_json = dataframe.to_dict(orient='records')
@@ -0,0 +1,104 @@
+from datetime import timedelta
+import json
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.frames import OFFER_FRAME_SCHEMA, amounts_from_cents, apply_schema
+from .models import OfferWorkspace, OfferWorkspaceItem
+
+# The session only carries the id of the workspace, never the offer rows
+SESSION_KEY = 'offer_workspace_id'
+
+WORKSPACE_BATCH_SIZE = 1000
+# Seconds without a write after which a workspace counts as abandoned
+WORKSPACE_MAX_AGE = getattr(settings, 'OFFER_WORKSPACE_MAX_AGE', 60 * 60 * 24 * 2)
+
+# SlowMoversReport columns copied into a workspace. Listed explicitly so internal
+# fields added to the report (brand_ref, sku parts, ...) never reach an offer file
+OFFER_REPORT_COLUMNS = ['id', 'report_date', 'sku', 'upc', 'brand', 'item_classification', 'description',
+                        'qtyin_oneyear', 'qtyout_oneyear', 'balance_oneyear', 'available', 'cost',
+                        'begining_balance', 'reference', 'percentage', 'sellercategory']
+
+
+def frame_records(df):
+    # JSON-safe list of row dicts (numpy scalars, NaN and dates converted); UPCs and SKUs stay strings.
+    # Money goes back from cents to amounts, as stored in the workspace and shown in the templates
+    df = amounts_from_cents(apply_schema(df.copy(), OFFER_FRAME_SCHEMA), OFFER_FRAME_SCHEMA)
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def get_workspace(request):
+    workspace_id = request.session.get(SESSION_KEY)
+    if not workspace_id:
+        return None
+    return OfferWorkspace.objects.filter(pk=workspace_id).first()
+
+
+def discard_workspace(request):
+    workspace_id = request.session.pop(SESSION_KEY, None)
+    if workspace_id:
+        OfferWorkspace.objects.filter(pk=workspace_id).delete()
+
+
+def purge_expired_workspaces(max_age=WORKSPACE_MAX_AGE):
+    # Delete workspaces (and their items) not written to for `max_age` seconds; returns the number deleted
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    deleted, by_model = OfferWorkspace.objects.filter(updated_at__lt=cutoff).delete()
+    return by_model.get(OfferWorkspace._meta.label, 0)
+
+
+def create_workspace(request, df):
+    # Replace the current workspace of this session with the rows of `df`; flows
+    # started but never saved or sent are cleaned up here as well
+    purge_expired_workspaces()
+    with transaction.atomic():
+        discard_workspace(request)
+        workspace = OfferWorkspace.objects.create(created_by=request.user)
+        OfferWorkspaceItem.objects.bulk_create(
+            [
+                OfferWorkspaceItem(workspace=workspace, position=position, sku=record['sku'], data=record)
+                for position, record in enumerate(frame_records(df))
+            ],
+            batch_size=WORKSPACE_BATCH_SIZE,
+        )
+    request.session[SESSION_KEY] = workspace.pk
+    return workspace
+
+
+def load_frame(workspace):
+    # Working frame of the workspace rows, money in cents
+    records = list(workspace.items.values_list('data', flat=True))
+    return apply_schema(pd.DataFrame.from_records(records), OFFER_FRAME_SCHEMA)
+
+
+def save_frame(workspace, df):
+    # Write back every row of `df`; used by whole-offer operations such as applying brand discounts
+    records_by_sku = {record['sku']: record for record in frame_records(df)}
+    items = list(workspace.items.filter(sku__in=list(records_by_sku)).only('pk', 'sku'))
+    for item in items:
+        item.data = records_by_sku[item.sku]
+    with transaction.atomic():
+        OfferWorkspaceItem.objects.bulk_update(items, ['data'], batch_size=WORKSPACE_BATCH_SIZE)
+        workspace.save(update_fields=['updated_at'])
+
+
+def update_item(workspace, sku, changes):
+    # Patch a single row in place; `changes` must hold JSON-serializable values.
+    # Returns the updated row, or None if the SKU is not in the workspace
+    item = workspace.items.filter(sku=sku).first()
+    if item is None:
+        return None
+    item.data = {**item.data, **changes}
+    with transaction.atomic():
+        item.save(update_fields=['data'])
+        workspace.save(update_fields=['updated_at'])
+    return item.data
+
+
+def remove_item(workspace, sku):
+    deleted, _ = workspace.items.filter(sku=sku).delete()
+    workspace.save(update_fields=['updated_at'])
+    return bool(deleted)
@@ -1,8 +1,9 @@
 from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
+from django.db import transaction
 from .models import Order
-from offers.models import Weekly_Offer
+from offers.reservations import adjust_order_quantities
 import json
 
 @admin.register(Order)
@@ -65,66 +66,51 @@ class OrderAdmin(admin.ModelAdmin):
     order_data_pretty.short_description = "Order Data"
 
     def approve_orders(self, request, queryset):
-        # Process each order in the queryset
-        for order in queryset:
-            # Call update method and check if it's successful
-            success = self.update_weekly_offer_quantities(request, order, subtract=True)
-
-            if success:
-                # If successful, mark the order as approved and save
-                order.is_approved = True
-                order.save()
-                messages.success(request, f"Order {order.order_id} has been successfully approved.")
-            else:
-                # If not successful, do not approve and notify the admin
+        with transaction.atomic():
+            # Lock the selected orders so two admins cannot approve the same order twice
+            orders = list(queryset.select_for_update().order_by('pk'))
+            pending = [order for order in orders if not order.is_approved]
+            for order in orders:
+                if order.is_approved:
+                    messages.warning(request, f"Order {order.order_id} is already approved.")
+
+            # Reserve the quantities of all pending orders in one batch
+            approved = self.update_weekly_offer_quantities(request, pending, subtract=True)
+            Order.objects.filter(pk__in=[order.pk for order in approved]).update(is_approved=True)
+
+        for order in approved:
+            messages.success(request, f"Order {order.order_id} has been successfully approved.")
+        for order in pending:
+            if order not in approved:
                 messages.error(request, f"Order {order.order_id} could not be approved due to insufficient quantities.", extra_tags='danger')
 
     approve_orders.short_description = 'Approve selected orders'
 
 
     def save_model(self, request, obj, form, change):
-        # Save the object first
-        super().save_model(request, obj, form, change)
-
-        # Check if 'is_approved' has been changed
-        is_approving = 'is_approved' in form.changed_data and obj.is_approved
-        is_unapproving = 'is_approved' in form.changed_data and not obj.is_approved
-
-        # Update quantities based on the approval status
-        if is_approving or is_unapproving:
-            # Call the method to update quantities and handle success or failure
-            success = self.update_weekly_offer_quantities(request, obj, subtract=is_approving)
-            if not success and is_approving:
-                # If there was an error in updating quantities, revert the is_approved change
-                obj.is_approved = False
-                obj.save(update_fields=['is_approved'])
-                # Optionally, you can add a message to inform the admin user
-                messages.error(request, "Failed to approve order due to insufficient quantities.")
-
-
-
-    def update_weekly_offer_quantities(self, request, order, subtract):
+        with transaction.atomic():
+            # Lock the stored order like approve_orders, and compare with its stored state rather than
+            # the form's, so an order approved concurrently is not reserved a second time
+            was_approved = change and Order.objects.select_for_update().values_list('is_approved', flat=True).get(pk=obj.pk)
+            super().save_model(request, obj, form, change)
+
+            # Update quantities when the approval status changes
+            if obj.is_approved != was_approved:
+                success = bool(self.update_weekly_offer_quantities(request, [obj], subtract=obj.is_approved))
+                if not success and obj.is_approved:
+                    # If there was an error in updating quantities, revert the is_approved change
+                    obj.is_approved = False
+                    obj.save(update_fields=['is_approved'])
+                    messages.error(request, "Failed to approve order due to insufficient quantities.")
+
+    def update_weekly_offer_quantities(self, request, orders, subtract):
+        # Lock, validate and update the Weekly_Offer quantities of `orders` in one transaction; returns the applied orders
         try:
-            for item in order.order_data:
-                sku = item.get('sku')
-                quantity = item.get('entered_quantity')
-                weekly_offer = Weekly_Offer.objects.get(sku=sku)
-
-                if subtract:
-                    if weekly_offer.available_qty >= quantity:
-                        weekly_offer.available_qty -= quantity
-                    else:
-                        messages.error(request, f"Not enough quantity for SKU {sku}.", extra_tags='danger')
-                        return False  # Return False to indicate failure
-                else:
-                    weekly_offer.available_qty += quantity
-
-                weekly_offer.save()
-            return True  # Return True to indicate success
-        except Weekly_Offer.DoesNotExist:
-            messages.error(request, f"Weekly offer with SKU {sku} does not exist.", extra_tags='danger')
-            return False
+            applied, failures = adjust_order_quantities(orders, subtract=subtract)
         except Exception as e:
             messages.error(request, f"An error occurred: {str(e)}", extra_tags='danger')
-            return False
+            return []
 
+        for order, error in failures.items():
+            messages.error(request, f"Order {order.order_id}: {error}", extra_tags='danger')
+        return applied
@@ -1,3 +1,49 @@
-from django.test import TestCase
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.contrib.admin.sites import AdminSite
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory, TransactionTestCase
+
+from offers.models import Weekly_Offer
+from .admin import OrderAdmin
+from .models import Order
+
+
+class OrderApprovalTests(TransactionTestCase):
+
+    def setUp(self):
+        self.offer = Weekly_Offer.objects.create(
+            sku='SKU1', upc=123456789012, description='Test', brand='BRAND', category='Makeup',
+            available_qty=10, msrp=Decimal('20.00'), discount=Decimal('10.00'),
+            offer_price=Decimal('18.00'), required_quantity=1,
+        )
+        self.order = Order.objects.create(
+            order_id='ORD-1', order_data=[{'sku': 'SKU1', 'entered_quantity': 6}],
+            customer_email='buyer@example.com', customer_firstname='Test', customer_lastname='Buyer',
+        )
+        self.admin = OrderAdmin(Order, AdminSite())
+
+    def request(self):
+        request = RequestFactory().post('/')
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return request
+
+    def approve_in_form(self, order):
+        order.is_approved = True
+        self.admin.save_model(self.request(), order, SimpleNamespace(changed_data=['is_approved']), change=True)
+
+    def test_form_approval_reserves_quantities(self):
+        self.approve_in_form(self.order)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.available_qty, 4)
+
+    def test_stale_form_does_not_reserve_twice(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.admin.approve_orders(self.request(), Order.objects.filter(pk=self.order.pk))
+
+        self.approve_in_form(stale)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.available_qty, 4)
+        self.assertTrue(Order.objects.get(pk=self.order.pk).is_approved)
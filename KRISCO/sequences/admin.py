@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Sequence
+# Register your models here.
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_value')
+    search_fields = ('name',)
+    readonly_fields = ('name',)
+
+admin.site.register(Sequence, SequenceAdmin)
@@ -0,0 +1,42 @@
+from django.db import IntegrityError, models, transaction
+
+# Create your models here.
+
+class Sequence(models.Model):
+    # One counter row per named sequence, e.g. 'customer:JD' or 'order'
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Sequence'
+        verbose_name_plural = 'Sequences'
+
+    def __str__(self):
+        return f"{self.name} ({self.last_value})"
+
+
+def allocate(name, count=1, initial=None):
+    """
+    Reserve the next `count` numbers of sequence `name` and return them as a range.
+
+    The counter row is locked with SELECT ... FOR UPDATE, so concurrent callers
+    are serialized and never receive the same number; a block of any size costs
+    one round trip. `initial` is an optional callable returning the last number
+    already in use and is only called the first time a sequence is seen, to
+    continue numbering of existing rows.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    with transaction.atomic():
+        sequence = Sequence.objects.select_for_update().filter(name=name).first()
+        if sequence is None:
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, last_value=initial() if initial else 0)
+            except IntegrityError:
+                pass  # Created concurrently; the locking read below sees the committed row
+            sequence = Sequence.objects.select_for_update().get(name=name)
+        first = sequence.last_value + 1
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value'])
+    return range(first, first + count)
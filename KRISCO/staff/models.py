@@ -1,4 +1,5 @@
 from django.db import models
+from sequences.models import allocate
 
 # Create your models here.
 class StaffEmailConfiguration(models.Model):
@@ -17,21 +18,15 @@ class StaffEmailConfiguration(models.Model):
             # Generate staff ID
             first_letter = self.first_name[0].upper()
             last_letter = self.last_name[0].upper()
-            print("First letter:", first_letter)
-            print("Last letter:", last_letter)
-            last_staff = StaffEmailConfiguration.objects.filter(first_name__startswith=first_letter, last_name__endswith=last_letter).order_by('-staff_id').first()
-            if last_staff:
-                print("Last staff ID:", last_staff.staff_id)
-                last_sequence = int(last_staff.staff_id.split('KS')[0][-3:])  # Extract the sequence number correctly
-                next_sequence = last_sequence + 1  # Increment the sequence by 1
-                print("Next sequence:", next_sequence)
-            else:
-                next_sequence = 1  # Start from 1 if no previous staff records found
-                print("No previous staff found.")
-            sequence_str = str(next_sequence).zfill(3)  # Use next_sequence here
-            print("Sequence string:", sequence_str)
-            self.staff_id = f"{first_letter}{last_letter}{sequence_str}KS"
-            print("Generated staff ID:", self.staff_id)
+            prefix = f"{first_letter}{last_letter}"
+
+            def last_in_use():
+                last_staff = StaffEmailConfiguration.objects.filter(staff_id__startswith=prefix).order_by('-staff_id').first()
+                return int(last_staff.staff_id[2:-2]) if last_staff else 0
+
+            sequence_num = allocate(f'staff:{prefix}', initial=last_in_use)[0]
+            sequence_str = str(sequence_num).zfill(3)
+            self.staff_id = f"{prefix}{sequence_str}KS"
         super().save(*args, **kwargs)
 
 